@@ -0,0 +1,118 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import main
+from simulator import SimulatedSlave
+
+# Benchmark the main.py read / write paths against a SimulatedSlave on a pty pair.
+# Results are printed as a table and can be written as JSON (--output) to compare runs across commits.
+
+SINGLE_READ_REGISTER = 70 # 1 based register used for single reads / writes, matching the preset numbering
+CONTIGUOUS_READ_COUNT = 50
+
+
+def percentile(ordered: list, fraction: float):
+    return ordered[int(fraction * (len(ordered) - 1))] if ordered else 0.0
+
+
+def measure(name: str, operation, iterations: int, slave: SimulatedSlave):
+    """Run 'operation' 'iterations' times and return throughput, latency and wire statistics."""
+    latencies = []
+    errors = 0
+    requests, bytes_received, bytes_sent = slave.requests, slave.bytes_received, slave.bytes_sent
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        op_start = time.perf_counter()
+        try:
+            operation()
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - op_start)
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "errors": errors,
+        "ops_per_sec": round(iterations / elapsed, 2),
+        "transactions_per_sec": round((slave.requests - requests) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "bytes_per_op": round((slave.bytes_received - bytes_received + slave.bytes_sent - bytes_sent) / iterations, 1),
+    }
+
+
+def read_presets_unplanned(instrument, json_data):
+    """One request per preset - the scan cost before plan_read_blocks(), kept as a baseline."""
+    for preset in main.get_read_presets(json_data):
+        instrument.read_register(int(preset["register"]) - 1, 0, 3)
+    for preset in main.get_read_mult_presets(json_data):
+        instrument.read_registers(int(preset["start_register"]) - 1, int(preset["read_count"]), 3)
+
+
+def run_benchmarks(baud_rates: list, iterations: int, response_delay: float = 0.0, error_rate: float = 0.0):
+    results = []
+    presets = main.preset_store.data
+    write_presets = main.get_write_presets(presets)
+
+    for baud_rate in baud_rates:
+        with SimulatedSlave(baud_rate=baud_rate, response_delay=response_delay, error_rate=error_rate) as slave:
+            instrument = main.connection_pool.get(slave.port, baud_rate, slave.device_id)
+            scenarios = [
+                ("single_read", lambda: instrument.read_register(SINGLE_READ_REGISTER - 1, 0, 3)),
+                ("contiguous_read", lambda: instrument.read_registers(0, CONTIGUOUS_READ_COUNT, 3)),
+                ("preset_scan", lambda: main.read_all_presets(instrument, presets)),
+                ("preset_scan_unplanned", lambda: read_presets_unplanned(instrument, presets)),
+                ("single_write", lambda: instrument.write_register(SINGLE_READ_REGISTER - 1, 1, 0, 16)),
+                ("preset_group_write", lambda: main.apply_write_presets(instrument, write_presets)),
+            ]
+            for name, operation in scenarios:
+                result = measure(name, operation, iterations, slave)
+                result["baud_rate"] = baud_rate
+                results.append(result)
+
+            main.connection_pool.close(slave.port)
+
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=main.current_dir).stdout.strip()
+    except OSError:
+        return ""
+
+
+def benchmark_main(argv: list):
+    parser = argparse.ArgumentParser(description="Benchmark Modbus read / write paths against a simulated RTU slave.")
+    parser.add_argument("--baud", type=int, action="append", choices=main.BAUD_RATES, help="Baud rate to test (repeatable, default: all BAUD_RATES)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--response-delay", type=float, default=0.0, help="Seconds the simulated slave waits before responding")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with no response / a bad CRC")
+    parser.add_argument("--transport", choices=["minimalmodbus", "native"], default=main.TRANSPORT, help="Serial transport used by create_virtual_device()")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    main.TRANSPORT = args.transport
+
+    results = run_benchmarks(args.baud or main.BAUD_RATES, args.iterations, args.response_delay, args.error_rate)
+
+    print(f"{'baud':>7} {'scenario':<22} {'ops/s':>9} {'tx/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes/op':>9} {'errors':>6}")
+    for r in results:
+        print(f"{r['baud_rate']:>7} {r['scenario']:<22} {r['ops_per_sec']:>9} {r['transactions_per_sec']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['bytes_per_op']:>9} {r['errors']:>6}")
+
+    if args.output:
+        report = {"revision": git_revision(), "timestamp": time.time(), "transport": args.transport, "iterations": args.iterations,
+                  "response_delay": args.response_delay, "error_rate": args.error_rate, "results": results}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    benchmark_main(sys.argv[1:])
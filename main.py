@@ -1,27 +1,120 @@
 import logging
-import minimalmodbus
-import serial.tools.list_ports
+import importlib
+import functools
 import json
 import os
 import sys
+import threading
+import time
+import heapq
+import collections
+import queue
+import csv
+import struct
+import argparse
+import socketserver
+import shutil
+import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from array import array
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access, so startup doesn't pay for it."""
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+minimalmodbus = LazyModule("minimalmodbus")
+serial = LazyModule("serial")
+
+
+@functools.lru_cache(maxsize=None)
+def optional_numpy():
+    """NumPy if installed (imported on first use) - used to vectorize decode_registers(). None otherwise."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
 # Define constants for MODBUS RTU instrument parameters. 
-PARITY = minimalmodbus.serial.PARITY_NONE
+PARITY = "N" # serial.PARITY_NONE - a literal so minimalmodbus / pyserial aren't imported at startup
 STOPBITS = 1
 BYTESIZE = 8
+TRANSPORT = os.environ.get("MODBUS_TRANSPORT", "minimalmodbus") # "minimalmodbus" or "native" (RtuTransport) for create_virtual_device().
 BAUD_RATES = [2400, 4800, 9600, 19200, 38400, 115200] # Commonly used Modbus RTU BAUD RATES (This is the data transfer rate in BITS per second.)
+MAX_READ_COUNT = 125 # Max number of registers a single Function Code 3 request can return.
+READ_GAP_THRESHOLD = 10 # Max number of unused registers to read through when merging presets into one request.
+MAX_WRITE_COUNT = 123 # Max number of registers a single Function Code 16 request can write.
+MAX_BIT_READ_COUNT = 2000 # Max number of coils / discrete inputs a single Function Code 1 / 2 request can return.
+BIT_READ_GAP_THRESHOLD = 16 * READ_GAP_THRESHOLD # Unused bits read through when merging bit presets - 16 bits cost the same as one register.
+BIT_FUNCTION_CODES = (1, 2) # Read Coils / Read Discrete Inputs - values are single bits, packed 8 per byte on the wire.
+READ_TABLES = {3: "Holding Registers", 4: "Input Registers", 1: "Coils", 2: "Discrete Inputs"} # Read preset 'function_code' -> Modbus table. Defaults to 3.
+DATA_TYPES = { # Preset 'data_type' -> (struct format character, registers per value). "bits" expands each register to 16 bits (LSB first).
+    "uint16": ("H", 1), "int16": ("h", 1),
+    "uint32": ("I", 2), "int32": ("i", 2), "float32": ("f", 2),
+    "uint64": ("Q", 4), "int64": ("q", 4), "float64": ("d", 4),
+    "bits": ("H", 1),
+}
+DEFAULT_CACHE_TTL = 0.5 # Seconds a cached register value is served before going back to the wire (presets can override with 'cache_ttl').
+DEFAULT_POLL_PERIOD = 1.0 # Seconds between polls for presets that do not define a 'poll_period'.
+TURNAROUND_TIME = 0.005 # Seconds allowed for a slave to start responding after a request (device processing time).
+RESPONSE_TIMEOUT_MARGIN = 0.1 # Seconds added to the estimated transaction time until enough latencies are measured for a device.
+ADAPTIVE_TIMEOUT_MARGIN = 0.02 # Seconds added to the measured p99 response latency once a device has enough samples.
+LATENCY_WINDOW = 200 # Number of recent response latencies kept per device for adaptive timeouts.
+LATENCY_MIN_SAMPLES = 20 # Latency samples needed before the measured p99 replaces the conservative timeout.
+LOG_ROTATE_BYTES = 50 * 1024 * 1024 # Start a new DataLogger file once the current one reaches this size.
+LOG_ROTATE_SECONDS = 3600 # Start a new DataLogger file after this many seconds.
+LOG_FLUSH_INTERVAL = 1.0 # Max seconds samples wait in the DataLogger buffer before being flushed to disk.
+LOG_QUEUE_SIZE = 100000 # Max samples waiting to be written. Samples are dropped (and counted) rather than blocking polling.
+PRESET_JOURNAL_COMPACT = 100 # Journal entries allowed before PresetStore rewrites "presets.json" and clears the journal.
+PRESET_INT_KEYS = ("register", "start_register", "read_count", "value", "function_code") # Preset fields normalized to int when loaded / edited.
+RETRY_POLICIES = { # Retries and exponential backoff (seconds) per request class, applied to No Response / Invalid Response errors.
+    "read": {"retries": 2, "backoff": 0.05, "max_backoff": 0.5},
+    "write": {"retries": 1, "backoff": 0.1, "max_backoff": 0.5},
+}
+CIRCUIT_BREAKER_THRESHOLD = 5 # Consecutive failed requests before a device is marked down.
+CIRCUIT_BREAKER_PROBE_INTERVAL = 10.0 # Seconds between probe requests to a device marked down.
+HOTPLUG_SCAN_INTERVAL = 0.5 # Seconds between port re-enumerations by the PortMonitor. Unplugged adapters are reopened within about this long of coming back.
+METRICS_EXPORT_INTERVAL = 10.0 # Seconds between METRICS_FILEPATH snapshot refreshes.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5) # Transaction latency histogram bucket upper bounds in seconds.
+GATEWAY_HOST = "127.0.0.1" # Modbus TCP Gateway listen address. Use "0.0.0.0" to serve the LAN.
+GATEWAY_PORT = 502 # Standard Modbus TCP port (below 1024 needs admin / root on most systems).
+GATEWAY_CACHE_TTL = 0.2 # Seconds a serial read response is reused for identical Modbus TCP read requests.
+DISCOVERY_BAUD_ORDER = [9600, 19200, 115200, 38400, 4800, 2400] # BAUD_RATES ordered from most to least likely for Device Discovery.
+DISCOVERY_TIMEOUT_MARGIN = 0.02 # Seconds added to the estimated probe transaction time before giving up on an ID.
+DISCOVERY_GARBAGE_LIMIT = 3 # Garbled / CRC error responses tolerated before abandoning a baud rate (likely the wrong baud).
+MONITOR_REFRESH_RATE = 10 # Max Live Monitor redraws per second - independent of the presets' poll rates.
+CAPTURE_INDEX_INTERVAL = 256 # Frames between seek points in a capture's ".mbidx" index.
 
 # Menu Option Lists
-MENU_OPTIONS = ["Read Register(s)", "Write Register", "Manage Presets", "Modbus Connection Settings", "Retry/Select  COM Device", "Exit"]
-READ_REG_OPTIONS = ["Read Single Register", "Read Contiguous Registers", "Select from Read Presets", "Select from Read-Multiple Presets", "Main Menu"]
-WRITE_REG_OPTIONS = ["Write Register", "Select from Write Presets", "Main Menu"]
+MENU_OPTIONS = ["Read Register(s)", "Write Register", "Manage Presets", "Modbus Connection Settings", "Retry/Select  COM Device", "Multi-Port Polling", "Discover Devices", "Transaction Stats", "Modbus TCP Gateway", "Snapshot / Restore", "Capture / Replay Traffic", "Exit"]
+READ_REG_OPTIONS = ["Read Single Register", "Read Contiguous Registers", "Select from Read Presets", "Select from Read-Multiple Presets", "Read All Presets", "Poll Presets Continuously", "Read Input Registers (FC4)", "Read Coils (FC1)", "Read Discrete Inputs (FC2)", "Live Monitor View", "Main Menu"]
+WRITE_REG_OPTIONS = ["Write Register", "Select from Write Presets", "Apply Write Preset Group", "Provision Fleet (Many Device IDs)", "Main Menu"]
 PRESET_MENU_OPTIONS = ["Add new Read Preset", "Add new Read-Multiple Preset", "Add new Write Preset", "Modify Read Presets", "Modify Read-Multiple Presets", "Modify Write Presets", "Main Menu"]
+SNAPSHOT_OPTIONS = ["Take Snapshot", "Diff Two Snapshots", "Diff Snapshot vs Device", "Restore Snapshot to Device", "Main Menu"]
+CAPTURE_OPTIONS = ["Start Capture", "Stop Capture", "Replay Capture (Simulated Port)", "Replay Capture to Device", "Main Menu"]
 MB_CONNECTION_SETTINGS = ["Change Baud Rate", "Change Device ID", "Main Menu"]
 
 current_dir = os.path.dirname(os.path.abspath(__file__))  # Get the parent directory of the current file.
 PRESETS_FILEPATH = os.path.join(current_dir, "presets.json") # Define path to "presets.json" using the determined parent directory.
+PRESETS_JOURNAL_FILEPATH = os.path.join(current_dir, "presets.journal") # Append-only log of preset changes not yet compacted into "presets.json".
+METRICS_FILEPATH = os.path.join(current_dir, "metrics.prom") # Transaction metrics snapshot. Prometheus text format, or JSON if the path ends in ".json".
+SNAPSHOTS_DIRPATH = os.path.join(current_dir, "snapshots") # Directory for register space snapshot (.mbsnap) files.
+CAPTURES_DIRPATH = os.path.join(current_dir, "captures") # Directory for raw traffic capture (.mbcap / .mbidx) files.
+PROVISION_LOG_FILEPATH = os.path.join(current_dir, "provisioning.jsonl") # Per device results of 'Provision Fleet', used to resume an interrupted run.
+SESSION_FILEPATH = os.path.join(current_dir, "session.json") # Last known-good port / baud / ID, reused at startup to skip port enumeration and prompts.
+LOGS_DIRPATH = os.path.join(current_dir, "logs") # Directory for DataLogger output files.
 
 # ANSI Escape Codes for colors
 RED = "\033[31m"
@@ -39,15 +132,27 @@ MENU_FMTCLR = f"{GREEN}{BOLD}{UNDERLINE}" # Standardized ANSI Menu Format/Colori
 
 def main():
     print(f"{MENU_FMTCLR}### Modbus RTU Config Tool ###{RESET}")
-    com_devices, menu_items = list_serial_ports()
-    selected_port = select_com_device(com_devices, menu_items)
     bypass_com = False
     baud_rate = 0
     device_ID = 0
+    
+    # Resume the last known-good session if its port is still there, otherwise enumerate ports and prompt
+    profile = load_session_profile()
+    if profile and port_present(profile["port"]):
+        selected_port, baud_rate, device_ID = profile["port"], profile["baud_rate"], profile["device_id"]
+        logging.info(f"{GREEN}Resumed last session: '{selected_port}' - Baud: {baud_rate} - ID: {device_ID}. (Options 4 / 5 to change){RESET}")
+        warm_imports()
+    else:
+        com_devices, menu_items = list_serial_ports()
+        selected_port = select_com_device(com_devices, menu_items)
     status_color = GREEN
+    transaction_metrics.start_export()
+    connection_pool.monitor = port_monitor # Watch for replugs once a port is opened
     
     # Main Menu Loop
     while True:
+        if selected_port:
+            selected_port = connection_pool.resolve(selected_port) # Follow an adapter the PortMonitor found under a new name
         selected_port, bypass_com, status_color, baud_rate, device_ID = handle_port_init(selected_port, bypass_com, status_color, baud_rate, device_ID)
         print_menu_options(MENU_OPTIONS, base=1, label=f"\n{BOLD}{UNDERLINE}{status_color}Main Menu Options - {selected_port} - Baud: {baud_rate} - ID: {device_ID}{RESET}")
         exit_option: int = len(MENU_OPTIONS)
@@ -66,11 +171,36 @@ def main():
                     baud_rate, device_ID = modify_mb_connection(baud_rate, device_ID)
 
                 case 5:
+                    connection_pool.close()
                     com_devices, menu_items = list_serial_ports()
                     selected_port = select_com_device(com_devices, menu_items)
                     clear_console()
+
+                case 6:
+                    multi_port_polling(baud_rate, device_ID)
+
+                case 7:
+                    discovered = discover_devices_menu()
+                    if discovered:
+                        selected_port, baud_rate, device_ID = discovered
+
+                case 8:
+                    print_transaction_stats()
+
+                case 9:
+                    modbus_tcp_gateway_menu(selected_port, baud_rate, device_ID)
+
+                case 10:
+                    snapshot_menu(selected_port, baud_rate, device_ID)
+
+                case 11:
+                    capture_menu(selected_port)
                     
                 case exit_option:  # noqa: F841
+                    frame_capture.stop()
+                    connection_pool.close()
+                    preset_store.compact()
+                    save_session_profile()
                     print("Exit App...")
                     break
                 
@@ -120,7 +250,8 @@ def clear_console():
 def list_serial_ports():
     """Return a list of connected serial devices to determine COM port
     """
-    ports = serial.tools.list_ports.comports()
+    from serial.tools import list_ports # Deferred - enumerating ports is only needed without a saved session profile
+    ports = list_ports.comports()
     available_ports = [] # List of actual COM devices
     ports_menu_items = [] # List of COM devices that aligns with available_ports
 
@@ -131,6 +262,47 @@ def list_serial_ports():
     return available_ports, ports_menu_items
 
 
+def port_present(com_port: str):
+    """Cheap check that a saved port still exists, without enumerating every serial device.
+
+    Device nodes are checked on the filesystem. Windows COM names can't be, so they're assumed present and confirmed by the first request.
+    """
+    if os.name == "nt":
+        return True
+    return os.path.exists(com_port)
+
+
+def warm_imports():
+    """Import the serial stack in the background so the first request doesn't wait on it."""
+    threading.Thread(target=importlib.import_module, args=("minimalmodbus",), name="import-warmup", daemon=True).start()
+
+
+def load_session_profile():
+    """Return the saved {"port", "baud_rate", "device_id"} session profile, or None if there isn't a usable one."""
+    try:
+        with open(SESSION_FILEPATH, "r") as f:
+            profile = json.load(f)
+        if profile["baud_rate"] in BAUD_RATES and 1 <= int(profile["device_id"]) <= 254 and profile["port"]:
+            return profile
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def save_session_profile():
+    """Save the last (port, baud, ID) that completed a transaction as the session profile for the next launch."""
+    if connection_pool.last_good is None:
+        return
+    com_port, baud_rate, device_id = connection_pool.last_good
+    temp_path = f"{SESSION_FILEPATH}.tmp"
+    try:
+        with open(temp_path, "w") as f:
+            json.dump({"port": com_port, "baud_rate": baud_rate, "device_id": device_id}, f)
+        os.replace(temp_path, SESSION_FILEPATH)
+    except OSError as e:
+        logging.info(f"{RED}Could not save session profile - {e}{RESET}")
+
+
 def select_com_device(com_devices: list, display_items: list = []):
     """Handle COM port selection when the application is started.
     """
@@ -165,10 +337,13 @@ def select_com_device(com_devices: list, display_items: list = []):
     return selected_port
 
         
-def create_virtual_device(com_port, baud_rate: int, device_id: int):
+def create_virtual_device(com_port, baud_rate: int, device_id: int, transport: str | None = None):
     """Create a virtual Modbus RTU instrument instance.\n
-    Returns a minimalmodbus.Instrument object instance
+    Returns a minimalmodbus.Instrument object instance, or an RtuTransport if 'transport' (default TRANSPORT) is "native"
     """
+    if (transport or TRANSPORT) == "native":
+        return RtuTransport(com_port, baud_rate, device_id)
+
     instrument = minimalmodbus.Instrument(com_port, device_id)
     
     if instrument.serial is not None:
@@ -177,7 +352,7 @@ def create_virtual_device(com_port, baud_rate: int, device_id: int):
         instrument.serial.bytesize = BYTESIZE
         instrument.serial.parity = PARITY
         instrument.serial.stopbits = STOPBITS
-        instrument.serial.timeout = 1  # seconds
+        instrument.serial.timeout = response_timeout(baud_rate, 5 + 2 * MAX_READ_COUNT)  # seconds - Worst case (Max size FC3 read) for this baud rate
 
         # Set mode to RTU - required for Modbus RTU
         instrument.mode = minimalmodbus.MODE_RTU
@@ -185,6 +360,710 @@ def create_virtual_device(com_port, baud_rate: int, device_id: int):
     return instrument
 
 
+def build_crc16_table():
+    """Precompute the 256 entry lookup table for the Modbus CRC16 (polynomial 0xA001)."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+CRC16_TABLE = build_crc16_table()
+
+
+def crc16(data):
+    """Table driven Modbus RTU CRC16 of 'data' (bytes, bytearray or memoryview)."""
+    crc = 0xFFFF
+    table = CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class RtuTransport:
+    """Lean Modbus RTU master with the same read / write methods as minimalmodbus.Instrument.\n
+    Frames are built in preallocated bytearrays, the CRC uses CRC16_TABLE and responses are parsed in place with
+    struct.unpack_from, so a transaction allocates little beyond the decoded values. Raises the minimalmodbus
+    exception types so existing error handling is unchanged.
+    """
+    MAX_FRAME = 256 # Max Modbus RTU frame size in bytes
+    
+    def __init__(self, com_port, baud_rate: int, device_id: int):
+        self.address = device_id
+        self.mode = minimalmodbus.MODE_RTU
+        self.serial = serial.Serial(com_port, baud_rate, bytesize=BYTESIZE, parity=PARITY, stopbits=STOPBITS,
+                                    timeout=response_timeout(baud_rate, 5 + 2 * MAX_READ_COUNT))
+        self._tx = bytearray(self.MAX_FRAME)
+        self._rx = bytearray(self.MAX_FRAME)
+        self._tx_view = memoryview(self._tx)
+        self._rx_view = memoryview(self._rx)
+        self._register_structs: dict[int, struct.Struct] = {}
+        self._last_activity = 0.0
+
+    def _send(self, length: int):
+        """Append the CRC to the first 'length' bytes of the request buffer and write it after the t3.5 silent interval."""
+        struct.pack_into("<H", self._tx, length, crc16(self._tx_view[:length]))
+        wait = silent_interval(self.serial.baudrate) - (time.monotonic() - self._last_activity)
+        if wait > 0:
+            time.sleep(wait)
+        self.serial.reset_input_buffer()
+        self.serial.write(self._tx_view[:length + 2])
+
+    def _receive(self, function_code: int, length: int):
+        """Read a 'length' byte response into the response buffer and validate it. Returns a memoryview of the frame."""
+        rx = self._rx_view
+        received = self.serial.readinto(rx[:5]) # Exception responses are 5 bytes - read those first
+        if received < 5:
+            self._last_activity = time.monotonic()
+            if received == 0:
+                raise minimalmodbus.NoResponseError("No communication with the instrument (no answer)")
+            raise minimalmodbus.InvalidResponseError(f"Too short Modbus RTU response: {bytes(rx[:received]).hex()}")
+
+        if self._rx[1] == function_code | 0x80:
+            length = 5
+        elif length > 5:
+            received += self.serial.readinto(rx[5:length])
+        self._last_activity = time.monotonic()
+
+        frame = rx[:received]
+        if received < length:
+            raise minimalmodbus.InvalidResponseError(f"Too short Modbus RTU response: {bytes(frame).hex()}")
+        if crc16(frame[:-2]) != struct.unpack_from("<H", self._rx, received - 2)[0]:
+            raise minimalmodbus.InvalidResponseError(f"CRC error in Modbus RTU response: {bytes(frame).hex()}")
+        if self._rx[0] != self.address:
+            raise minimalmodbus.InvalidResponseError(f"Wrong device ID {self._rx[0]} in response (expected {self.address})")
+        if self._rx[1] == function_code | 0x80:
+            self._raise_slave_exception(self._rx[2])
+        if self._rx[1] != function_code:
+            raise minimalmodbus.InvalidResponseError(f"Wrong function code {self._rx[1]} in response (expected {function_code})")
+        return frame
+
+    def _raise_slave_exception(self, code: int):
+        if code in (1, 2, 3):
+            raise minimalmodbus.IllegalRequestError(f"Slave reported illegal data address / value / function (code {code})")
+        if code == 6:
+            raise minimalmodbus.SlaveDeviceBusyError("Slave reported device busy (code 6)")
+        if code == 7:
+            raise minimalmodbus.NegativeAcknowledgeError("Slave reported negative acknowledge (code 7)")
+        raise minimalmodbus.SlaveReportedException(f"Slave reported exception code {code}")
+
+    def _register_struct(self, count: int):
+        compiled = self._register_structs.get(count)
+        if compiled is None:
+            compiled = self._register_structs[count] = struct.Struct(f">{count}H")
+        return compiled
+
+    def read_registers(self, registeraddress: int, number_of_registers: int, functioncode: int = 3):
+        struct.pack_into(">BBHH", self._tx, 0, self.address, functioncode, registeraddress, number_of_registers)
+        self._send(6)
+        self._receive(functioncode, 5 + 2 * number_of_registers)
+        if self._rx[2] != 2 * number_of_registers:
+            raise minimalmodbus.InvalidResponseError(f"Wrong byte count {self._rx[2]} in response (expected {2 * number_of_registers})")
+        return list(self._register_struct(number_of_registers).unpack_from(self._rx, 3))
+
+    def read_register(self, registeraddress: int, number_of_decimals: int = 0, functioncode: int = 3, signed: bool = False):
+        value = self.read_registers(registeraddress, 1, functioncode)[0]
+        if signed and value >= 0x8000:
+            value -= 0x10000
+        return value / 10 ** number_of_decimals if number_of_decimals else value
+
+    def write_register(self, registeraddress: int, value, number_of_decimals: int = 0, functioncode: int = 16, signed: bool = False):
+        value = int(round(value * 10 ** number_of_decimals)) & 0xFFFF if signed else int(round(value * 10 ** number_of_decimals))
+        if functioncode == 6:
+            struct.pack_into(">BBHH", self._tx, 0, self.address, 6, registeraddress, value)
+            self._send(6)
+            self._receive(6, 8)
+        else:
+            self.write_registers(registeraddress, [value])
+
+    def write_registers(self, registeraddress: int, values: list):
+        count = len(values)
+        struct.pack_into(">BBHHB", self._tx, 0, self.address, 16, registeraddress, count, 2 * count)
+        self._register_struct(count).pack_into(self._tx, 7, *values)
+        self._send(7 + 2 * count)
+        self._receive(16, 8)
+
+    def read_packed_bits(self, registeraddress: int, number_of_bits: int, functioncode: int = 2):
+        """FC1 / FC2 read returning the bits as sent on the wire - packed 8 per byte, LSB first (see unpack_bits())."""
+        byte_count = (number_of_bits + 7) // 8
+        struct.pack_into(">BBHH", self._tx, 0, self.address, functioncode, registeraddress, number_of_bits)
+        self._send(6)
+        self._receive(functioncode, 5 + byte_count)
+        if self._rx[2] != byte_count:
+            raise minimalmodbus.InvalidResponseError(f"Wrong byte count {self._rx[2]} in response (expected {byte_count})")
+        return bytes(self._rx_view[3:3 + byte_count])
+
+    def read_bits(self, registeraddress: int, number_of_bits: int, functioncode: int = 2):
+        return unpack_bits(self.read_packed_bits(registeraddress, number_of_bits, functioncode), number_of_bits)
+
+    def read_bit(self, registeraddress: int, functioncode: int = 2):
+        return self.read_packed_bits(registeraddress, 1, functioncode)[0] & 1
+
+    def write_bit(self, registeraddress: int, value: int, functioncode: int = 5):
+        if functioncode == 15:
+            self.write_bits(registeraddress, [value])
+            return
+        struct.pack_into(">BBHH", self._tx, 0, self.address, 5, registeraddress, 0xFF00 if value else 0)
+        self._send(6)
+        self._receive(5, 8)
+
+    def write_bits(self, registeraddress: int, bits: list):
+        packed = pack_bits(bits)
+        struct.pack_into(">BBHHB", self._tx, 0, self.address, 15, registeraddress, len(bits), len(packed))
+        self._tx[7:7 + len(packed)] = packed
+        self._send(7 + len(packed))
+        self._receive(15, 8)
+
+
+def char_time(baud_rate: int):
+    """Seconds needed to send one serial character (start + data + parity + stop bits)."""
+    parity_bits = 0 if PARITY == "N" else 1
+    return (1 + BYTESIZE + parity_bits + STOPBITS) / baud_rate
+
+
+def silent_interval(baud_rate: int):
+    """Modbus RTU t3.5 inter-frame silent interval in seconds. Fixed at 1.75 ms above 19200 baud per the spec."""
+    if baud_rate > 19200:
+        return 0.00175
+    return 3.5 * char_time(baud_rate)
+
+
+def estimate_transaction_time(baud_rate: int, request_bytes: int, response_bytes: int):
+    """Estimated seconds of bus time for one request/response exchange."""
+    return (request_bytes + response_bytes) * char_time(baud_rate) + 2 * silent_interval(baud_rate) + TURNAROUND_TIME
+
+
+def response_timeout(baud_rate: int, response_bytes: int, request_bytes: int = 8):
+    """Conservative timeout in seconds for a response of 'response_bytes' at 'baud_rate'."""
+    return estimate_transaction_time(baud_rate, request_bytes, response_bytes) + RESPONSE_TIMEOUT_MARGIN
+
+
+def expected_response_bytes(method: str, args: tuple, kwargs: dict):
+    """Expected RTU response length for a minimalmodbus.Instrument method call."""
+    if method == "read_registers":
+        count = kwargs.get("number_of_registers", args[1] if len(args) > 1 else 1)
+        return 5 + 2 * count
+    if method == "read_register":
+        return 7
+    if method in ("read_long", "read_float"):
+        return 5 + 2 * kwargs.get("number_of_registers", 2)
+    if method in ("read_bits", "read_packed_bits"):
+        count = kwargs.get("number_of_bits", args[1] if len(args) > 1 else 1)
+        return 5 + (count + 7) // 8
+    if method == "read_bit":
+        return 6
+    if method.startswith("write_"):
+        return 8
+    
+    return 5 + 2 * MAX_READ_COUNT # Unknown - assume the largest response
+
+
+def expected_request_bytes(method: str, args: tuple, kwargs: dict):
+    """RTU request length for a minimalmodbus.Instrument method call."""
+    if method == "write_registers":
+        values = kwargs.get("values", args[1] if len(args) > 1 else [])
+        return 9 + 2 * len(values)
+    if method == "write_bits":
+        bits = kwargs.get("bits", args[1] if len(args) > 1 else [])
+        return 9 + (len(bits) + 7) // 8
+    if method in ("write_long", "write_float"):
+        return 9 + 2 * kwargs.get("number_of_registers", 2)
+    
+    return 8 # Reads and single register / bit writes
+
+
+class TransactionMetrics:
+    """Per (port, device ID) transaction counters and latency histograms.\n
+    Bytes are the expected RTU frame sizes for each call. Responses are only counted for successful transactions.
+    """
+    def __init__(self):
+        self._stats: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+        self._export_thread = None
+
+    def record(self, com_port, device_id: int, latency: float, bytes_sent: int, bytes_received: int, error: Exception | None = None, retries: int = 0):
+        with self._lock:
+            stats = self._stats.get((com_port, device_id))
+            if stats is None:
+                stats = self._stats[(com_port, device_id)] = {
+                    "transactions": 0, "errors": {}, "retries": 0, "bytes_sent": 0, "bytes_received": 0,
+                    "latency_sum": 0.0, "latency_max": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            
+            stats["transactions"] += 1
+            stats["retries"] += retries
+            stats["bytes_sent"] += bytes_sent
+            stats["bytes_received"] += bytes_received
+            stats["latency_sum"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+            stats["buckets"][next((idx for idx, bound in enumerate(LATENCY_BUCKETS) if latency <= bound), len(LATENCY_BUCKETS))] += 1
+            if error is not None:
+                error_class = type(error).__name__
+                stats["errors"][error_class] = stats["errors"].get(error_class, 0) + 1
+
+    def snapshot(self):
+        """Copy of the stats as {"port|device_id": stats} for JSON export."""
+        with self._lock:
+            return {f"{com_port}|{device_id}": {**stats, "errors": dict(stats["errors"]), "buckets": list(stats["buckets"])}
+                    for (com_port, device_id), stats in self._stats.items()}
+
+    def latency_quantile(self, stats: dict, fraction: float):
+        """Approximate latency quantile - the upper bound of the histogram bucket containing it."""
+        target = fraction * stats["transactions"]
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS + (stats["latency_max"],), stats["buckets"]):
+            running += count
+            if running >= target:
+                return bound
+        return stats["latency_max"]
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            items = [(key, {**stats, "errors": dict(stats["errors"])}) for key, stats in self._stats.items()]
+        
+        for (com_port, device_id), stats in items:
+            labels = f'port="{com_port}",device_id="{device_id}"'
+            lines.append(f"modbus_transactions_total{{{labels}}} {stats['transactions']}")
+            lines.append(f"modbus_retries_total{{{labels}}} {stats['retries']}")
+            lines.append(f"modbus_bytes_sent_total{{{labels}}} {stats['bytes_sent']}")
+            lines.append(f"modbus_bytes_received_total{{{labels}}} {stats['bytes_received']}")
+            for error_class, count in stats["errors"].items():
+                lines.append(f'modbus_errors_total{{{labels},error="{error_class}"}} {count}')
+            
+            running = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                running += count
+                lines.append(f'modbus_latency_seconds_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'modbus_latency_seconds_bucket{{{labels},le="+Inf"}} {stats["transactions"]}')
+            lines.append(f"modbus_latency_seconds_sum{{{labels}}} {stats['latency_sum']:.6f}")
+            lines.append(f"modbus_latency_seconds_count{{{labels}}} {stats['transactions']}")
+        
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, file_path: str = METRICS_FILEPATH):
+        """Atomically replace 'file_path' with the current stats (JSON if it ends in ".json", otherwise Prometheus text)."""
+        temp_path = f"{file_path}.tmp"
+        if file_path.endswith(".json"):
+            save_json(temp_path, self.snapshot())
+        else:
+            with open(temp_path, "w") as f:
+                f.write(self.prometheus_text())
+        os.replace(temp_path, file_path)
+
+    def start_export(self, file_path: str = METRICS_FILEPATH, interval: float = METRICS_EXPORT_INTERVAL):
+        """Refresh 'file_path' every 'interval' seconds on a background thread."""
+        if self._export_thread is not None:
+            return
+
+        def export():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot(file_path)
+                except OSError as e:
+                    logging.info(f"{RED}Metrics export failed: {e}{RESET}")
+
+        self._export_thread = threading.Thread(target=export, name="metrics-export", daemon=True)
+        self._export_thread.start()
+
+
+transaction_metrics = TransactionMetrics()
+
+
+def print_transaction_stats():
+    """Menu handler - Print the transaction stats for every port / device ID used this session."""
+    snapshot = transaction_metrics.snapshot()
+    print(f"\n{MENU_FMTCLR}Transaction Stats (Snapshot file: {METRICS_FILEPATH}){RESET}")
+    if not snapshot:
+        print("No transactions yet.")
+        return
+    
+    for key, stats in snapshot.items():
+        com_port, device_id = key.split("|")
+        errors = sum(stats["errors"].values())
+        color = RED if errors else GREEN
+        print(f"   {color}{com_port} - ID: {device_id} - Transactions: {stats['transactions']} - Errors: {errors} {stats['errors'] or ''}"
+              f" - Retries: {stats['retries']}{RESET}")
+        print(f"      Latency avg: {stats['latency_sum'] / stats['transactions'] * 1000:.1f} ms - p50 <= {transaction_metrics.latency_quantile(stats, 0.5) * 1000:.0f} ms"
+              f" - p99 <= {transaction_metrics.latency_quantile(stats, 0.99) * 1000:.0f} ms - max: {stats['latency_max'] * 1000:.1f} ms"
+              f" - Bytes sent / received: {stats['bytes_sent']} / {stats['bytes_received']}")
+
+
+class LatencyTracker:
+    """Recent response latencies for one device, used to tighten its timeout.\n
+    Latencies are stored as the time beyond the estimated wire time so responses of any size share one window.
+    """
+    def __init__(self, baud_rate: int):
+        self.baud_rate = baud_rate
+        self.excess = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency: float, response_bytes: int, request_bytes: int = 8):
+        self.excess.append(max(0.0, latency - estimate_transaction_time(self.baud_rate, request_bytes, response_bytes)))
+
+    def p99(self):
+        ordered = sorted(self.excess)
+        return ordered[int(0.99 * (len(ordered) - 1))]
+
+    def timeout(self, response_bytes: int, request_bytes: int = 8):
+        """Measured p99 + ADAPTIVE_TIMEOUT_MARGIN once there are enough samples, otherwise response_timeout()."""
+        if len(self.excess) < LATENCY_MIN_SAMPLES:
+            return response_timeout(self.baud_rate, response_bytes, request_bytes)
+        
+        return estimate_transaction_time(self.baud_rate, request_bytes, response_bytes) + self.p99() + ADAPTIVE_TIMEOUT_MARGIN
+
+
+class SlaveDownError(Exception):
+    """Raised instead of sending a request to a device whose CircuitBreaker is open."""
+
+
+class PortDisconnectedError(SlaveDownError):
+    """Raised instead of sending a request on a port whose adapter is unplugged, until the PortMonitor reopens it."""
+
+
+class CircuitBreaker:
+    """Marks a device down after CIRCUIT_BREAKER_THRESHOLD consecutive failures.\n
+    While down, requests fail immediately with SlaveDownError so they don't burn bus time on timeouts. One probe
+    request is let through every CIRCUIT_BREAKER_PROBE_INTERVAL seconds and a success marks the device up again.
+    """
+    def __init__(self, name: str, threshold: int = CIRCUIT_BREAKER_THRESHOLD, probe_interval: float = CIRCUIT_BREAKER_PROBE_INTERVAL):
+        self.name = name
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def check(self):
+        """Raise SlaveDownError if the device is down and it is not time for a probe request."""
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.probe_interval:
+            raise SlaveDownError(f"{self.name} is marked down after {self.failures} failed requests. Next probe in {self.probe_interval - (time.monotonic() - self.opened_at):.1f}s")
+        self.opened_at = time.monotonic() # Let this probe through, hold off the rest until the next interval
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logging.info(f"{GREEN}{self.name} is responding again.{RESET}")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                logging.info(f"{RED}{self.name} marked down after {self.failures} failed requests.{RESET}")
+            self.opened_at = time.monotonic()
+
+
+class PooledConnection:
+    """One open Instrument (serial handle) for a (port, baud, framing) key.\n
+    The lock serializes access to the half-duplex line across every slave view on the port.
+    """
+    def __init__(self, com_port, baud_rate: int):
+        self.key = (com_port, baud_rate, BYTESIZE, PARITY, STOPBITS)
+        self.instrument = self._open(com_port, baud_rate)
+        self.lock = threading.RLock()
+        self.latency: dict[int, LatencyTracker] = {} # Device ID -> LatencyTracker
+        self.breakers: dict[int, CircuitBreaker] = {} # Device ID -> CircuitBreaker
+        self.hwid = None # Adapter hardware ID, recorded by the PortMonitor to find the adapter again after a replug
+        self.connected = True
+
+    @staticmethod
+    def _open(com_port, baud_rate: int):
+        instrument = create_virtual_device(com_port, baud_rate, 1)
+        # minimalmodbus shares Serial objects per port name, so a previously closed handle may be handed back
+        if instrument.serial is not None and not instrument.serial.is_open:
+            instrument.serial.open()
+        return instrument
+
+    def close(self):
+        with self.lock:
+            if self.instrument.serial is not None and self.instrument.serial.is_open:
+                self.instrument.serial.close()
+
+    def mark_disconnected(self):
+        """Close the handle of an adapter that went away, so requests fail fast until it is reopened."""
+        with self.lock:
+            if self.connected:
+                logging.info(f"{RED}'{self.key[0]}' was disconnected. Waiting for the adapter to come back...{RESET}")
+            self.connected = False
+            try:
+                self.close()
+            except OSError:
+                pass # The device node is already gone
+
+    def reopen(self, com_port):
+        """Reopen on 'com_port' (the adapter's current name). SlaveViews stay attached, so their users carry on."""
+        with self.lock:
+            self.instrument = self._open(com_port, self.key[1])
+            self.key = (com_port,) + self.key[1:]
+            self.connected = True
+
+
+class SlaveView:
+    """Lightweight per-device ID view of a PooledConnection.\n
+    Exposes the minimalmodbus.Instrument read/write methods, addressing each call to 'device_id'.
+    """
+    def __init__(self, connection: PooledConnection, device_id: int):
+        self.connection = connection
+        self.device_id = device_id
+
+    @property
+    def lock(self):
+        return self.connection.lock
+
+    @property
+    def port(self):
+        return self.connection.key[0]
+
+    def _transaction(self, name: str, args: tuple, kwargs: dict, attempt: int):
+        """Send one request under the port lock with this device's timeout, recording latency and metrics."""
+        with self.connection.lock:
+            instrument = self.connection.instrument
+            instrument.address = self.device_id
+            
+            # Set the timeout for this device and request / response size, then record the measured latency.
+            # The request's wire time counts too - a 123 register FC16 write is 255 bytes on the wire before the slave can answer
+            tracker = self.connection.latency.setdefault(self.device_id, LatencyTracker(self.connection.key[1]))
+            response_bytes = expected_response_bytes(name, args, kwargs)
+            request_bytes = expected_request_bytes(name, args, kwargs)
+            timeout = tracker.timeout(response_bytes, request_bytes)
+            if instrument.serial is not None and instrument.serial.timeout != timeout:
+                instrument.serial.timeout = timeout # pyserial reconfigures the port on every set, so only set on change
+            
+            retries = 1 if attempt else 0
+            capture = frame_capture if frame_capture.active else None
+            if capture is not None:
+                capture.attach(instrument)
+            start = time.perf_counter()
+            try:
+                result = getattr(instrument, name)(*args, **kwargs) # Looked up per call - the instrument is replaced on reconnect
+            except minimalmodbus.ModbusException as e:
+                # Timeouts / exception responses from one device - ModbusException subclasses OSError in minimalmodbus 2.x,
+                # so it must be handled before the disconnect check below
+                transaction_metrics.record(self.port, self.device_id, time.perf_counter() - start, request_bytes, 0, e, retries)
+                raise
+            except OSError as e:
+                # pyserial errors (SerialException is an OSError) mean the adapter is gone - the PortMonitor reopens it
+                transaction_metrics.record(self.port, self.device_id, time.perf_counter() - start, request_bytes, 0, e, retries)
+                self.connection.mark_disconnected()
+                raise PortDisconnectedError(f"{self.port} disconnected - {e}") from e
+            except Exception as e:
+                transaction_metrics.record(self.port, self.device_id, time.perf_counter() - start, request_bytes, 0, e, retries)
+                raise
+            finally:
+                if capture is not None:
+                    capture.record(instrument, self.port, self.connection.key[1], self.device_id)
+            
+            latency = time.perf_counter() - start
+            tracker.record(latency, response_bytes, request_bytes)
+            transaction_metrics.record(self.port, self.device_id, latency, request_bytes, response_bytes, retries=retries)
+            connection_pool.last_good = (self.port, self.connection.key[1], self.device_id)
+            return result
+
+    def __getattr__(self, name):
+        attr = getattr(self.connection.instrument, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            if not self.connection.connected:
+                raise PortDisconnectedError(f"{self.port} is disconnected. Waiting for the adapter to come back...")
+            breaker = self.connection.breakers.setdefault(self.device_id, CircuitBreaker(f"{self.port} - ID: {self.device_id}"))
+            breaker.check()
+            policy = RETRY_POLICIES["write" if name.startswith("write") else "read"]
+            
+            for attempt in range(policy["retries"] + 1):
+                try:
+                    result = self._transaction(name, args, kwargs, attempt)
+                
+                except (minimalmodbus.NoResponseError, minimalmodbus.InvalidResponseError):
+                    if attempt == policy["retries"]:
+                        breaker.record_failure()
+                        raise
+                    # Back off without holding the port lock so other devices on the bus keep polling
+                    time.sleep(min(policy["max_backoff"], policy["backoff"] * 2 ** attempt))
+                    continue
+                
+                except minimalmodbus.ModbusException:
+                    breaker.record_success() # The device answered with an exception response - it is alive
+                    raise
+
+                breaker.record_success()
+                return result
+
+        return call
+
+
+class ConnectionPool:
+    """Keep one open connection per serial port and hand out SlaveViews for each device ID."""
+    def __init__(self):
+        self._connections: dict[str, PooledConnection] = {}
+        self._lock = threading.Lock()
+        self.last_good = None # (port, baud, device ID) of the last successful transaction - saved as the session profile
+        self._renamed: dict[str, str] = {} # Old port name -> current name, for adapters that came back under a new name
+        self.monitor = None # PortMonitor started when the first connection is opened
+
+    def resolve(self, com_port):
+        """Current name of 'com_port', following any reconnect under a new device name."""
+        return self._renamed.get(com_port, com_port)
+
+    def connections(self):
+        with self._lock:
+            return list(self._connections.values())
+
+    def rename(self, old_port, new_port):
+        """Re-key a connection the PortMonitor reopened under a new device name."""
+        with self._lock:
+            connection = self._connections.pop(old_port, None)
+            stale = self._connections.pop(new_port, None)
+            if stale is not None and stale is not connection:
+                stale.close()
+            if connection is not None:
+                self._connections[new_port] = connection
+            for name, current in list(self._renamed.items()):
+                if current == old_port:
+                    self._renamed[name] = new_port
+            self._renamed[old_port] = new_port
+            self._renamed.pop(new_port, None)
+
+    def get(self, com_port, baud_rate: int, device_id: int):
+        with self._lock:
+            com_port = self.resolve(com_port)
+            connection = self._connections.get(com_port)
+            
+            # Only one handle per port - reopen if the baud rate / framing changed
+            if connection is not None and connection.key != (com_port, baud_rate, BYTESIZE, PARITY, STOPBITS):
+                connection.close()
+                connection = None
+            
+            if connection is None:
+                connection = PooledConnection(com_port, baud_rate)
+                self._connections[com_port] = connection
+                if self.monitor is not None:
+                    self.monitor.start()
+            elif not connection.connected:
+                try:
+                    connection.reopen(com_port) # Don't wait for the PortMonitor if the port is already back
+                except OSError:
+                    pass
+
+        return SlaveView(connection, device_id)
+
+    def close(self, com_port=None):
+        """Close the connection for 'com_port', or every pooled connection if no port is given."""
+        with self._lock:
+            ports = [com_port] if com_port else list(self._connections)
+            for port in ports:
+                connection = self._connections.pop(port, None)
+                if connection is not None:
+                    connection.close()
+
+
+connection_pool = ConnectionPool() # Shared by every menu so each COM port is only opened once
+
+
+def hwid_identity(hwid: str):
+    """The part of a pyserial hwid that stays the same when the adapter is moved to another USB socket (drops LOCATION)."""
+    return hwid.split(" LOCATION=")[0]
+
+
+def find_port_by_hwid(ports: dict, hwid, com_port):
+    """Current device name of the adapter with 'hwid' in 'ports' ({device name: hwid}), or None if it isn't plugged in.
+
+    An exact hwid match wins, then a unique match ignoring the USB location. Ports without a hwid (e.g. "n/a" for
+    built-in / virtual ports) can only be matched by their name 'com_port'.
+    """
+    if not hwid or hwid == "n/a":
+        return com_port if com_port in ports else None
+    
+    for port, port_hwid in ports.items():
+        if port_hwid == hwid:
+            return port
+    
+    matches = [port for port, port_hwid in ports.items() if hwid_identity(port_hwid) == hwid_identity(hwid)]
+    return matches[0] if len(matches) == 1 else None
+
+
+class PortMonitor:
+    """Background watcher that spots pooled adapters being unplugged and plugged back in, and reopens them.
+
+    Adapters are matched by the hwid from list_ports.comports() (VID:PID / serial number), not by their volatile
+    device name, so an adapter that comes back as a different COM port / tty is still found. The PooledConnection is
+    reopened in place, so polling, logging and the gateway resume on their own without operator action.
+    Ports are only enumerated while the pool holds connections.
+    """
+    def __init__(self, pool: ConnectionPool, interval: float = HOTPLUG_SCAN_INTERVAL):
+        self.pool = pool
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="port-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        from serial.tools import list_ports
+        while not self._stop_event.is_set():
+            if not self.pool.connections():
+                self._stop_event.wait(self.interval)
+                continue
+            try:
+                self.scan({port.device: port.hwid for port in list_ports.comports()})
+            except Exception as e:
+                logging.info(f"{RED}Port monitor scan failed - {e}{RESET}") # Keep watching - retried on the next scan
+            self._stop_event.wait(self.interval)
+
+    def scan(self, ports: dict):
+        """Reconcile the pooled connections with the ports now present ({device name: hwid})."""
+        for connection in self.pool.connections():
+            com_port = connection.key[0]
+            if connection.hwid is None and com_port in ports:
+                connection.hwid = ports[com_port]
+            
+            # Ports never listed by comports() (ptys, socat links and other virtual ports) can't be tracked by hwid -
+            # they are only marked disconnected by a failed request, and reopened once their device node is back
+            if connection.hwid is None:
+                if not connection.connected and port_present(com_port):
+                    new_port = com_port
+                else:
+                    continue
+            elif connection.connected:
+                if com_port not in ports or ports[com_port] != connection.hwid:
+                    connection.mark_disconnected()
+                continue
+            else:
+                new_port = find_port_by_hwid(ports, connection.hwid, com_port)
+            
+            if new_port is None:
+                continue
+            try:
+                connection.reopen(new_port)
+            except OSError:
+                continue # The device node may not be ready yet - retried on the next scan
+            if new_port != com_port:
+                self.pool.rename(com_port, new_port)
+            logging.info(f"{GREEN}'{new_port}' reconnected.{RESET}")
+
+
+port_monitor = PortMonitor(connection_pool)
+
+
 def baud_input():
     print_menu_options(BAUD_RATES, base=1, label=f"\n{MENU_FMTCLR}Select Baud Rate(Bits per second) for device connection: (The Modbus Device Datasheet will provide the default Baud Rate) {RESET}")
     
@@ -220,10 +1099,10 @@ def read_registers(com_port, baud_rate: int, device_ID: int):
         print(f"{RED}Bypass mode active. No COM device to read from. Returning to Main Menu{RESET}")
         return
     
-    read_instrument = create_virtual_device(com_port, baud, device_id)  # Create a minimal modbus Instrument instance
+    read_instrument = connection_pool.get(com_port, baud, device_id)  # Get a pooled Instrument view for this device
 
-    try:
-        while True:
+    while True:
+        try:
             print_menu_options(READ_REG_OPTIONS, base = 1, label=f"\n{BOLD}{UNDERLINE}{GREEN}Read Register Options - Baud: {baud}, ID: {device_id}{RESET}") # Print Read Options 1 base
             read_type = get_int_input("Read Type: ")
             r_menuLen = len(READ_REG_OPTIONS)
@@ -232,7 +1111,7 @@ def read_registers(com_port, baud_rate: int, device_ID: int):
 
                 # Load Necessary JSON Read/Write Preset data
                 if read_type in (3, 4):
-                    json_preset_data = load_json(PRESETS_FILEPATH)
+                    json_preset_data = preset_store.data
                     
                     if read_type == 3:  
                         print(f"{MENU_FMTCLR}Read Presets:{RESET}")
@@ -242,10 +1121,11 @@ def read_registers(com_port, baud_rate: int, device_ID: int):
                         preset_choice = get_read_mult_presets(json_preset_data)
 
                     for i, preset in enumerate(preset_choice, start=1):
+                        table = f" ({READ_TABLES[preset_function_code(preset)]})" if preset_function_code(preset) != 3 else ""
                         if read_type == 3:
-                            print(f"{i}. {preset['name']} (type: {preset['type']}) (register: {preset['register']})") # Read Presets
+                            print(f"{i}. {preset['name']} (type: {preset['type']}) (register: {preset['register']}){table}") # Read Presets
                         elif read_type == 4:
-                            print(f"{i}. {preset['name']} (type: {preset['type']}) (start register: {preset['start_register']}) - Count {preset['read_count']}") # Read-Multiple Presets
+                            print(f"{i}. {preset['name']} (type: {preset['type']}) (start register: {preset['start_register']}) - Count {preset['read_count']}{table}") # Read-Multiple Presets
                             
                             
                     option = get_int_input("Option: ") - 1
@@ -260,10 +1140,46 @@ def read_registers(com_port, baud_rate: int, device_ID: int):
                         target_register = int(preset_selection['register'])
                         preset_label = preset_selection['name']
                     
-                    # Subtract 1 from the designated start_register to account for 0 base Registers
-                    read_register = read_instrument.read_register(target_register - 1, 0, 3)
+                    if read_type == 3:
+                        read_register = read_preset(read_instrument, preset_selection)
+                        read_register = read_register[0] if len(read_register) == 1 else read_register
+                    else:
+                        # Subtract 1 from the designated start_register to account for 0 base Registers
+                        read_register = read_instrument.read_register(target_register - 1, 0, 3)
                     print(f"\n{GREEN}Read Success for '{preset_label}'\n   {UNDERLINE}Register: {target_register}{RESET}\n   {GREEN}{UNDERLINE}Value: {read_register}{RESET}")
                     
+                if read_type == 5: # Read every Read / Read-Multiple preset using the fewest possible requests
+                    json_preset_data = preset_store.data
+                    preset_values = read_all_presets(read_instrument, json_preset_data)
+                    print(f"\n{GREEN}Read Success: - {READ_REG_OPTIONS[read_type - 1]}{RESET}")
+                    for name, value in preset_values.items():
+                        print(f"   {GREEN}{UNDERLINE}{name} - Value: {value}{RESET}")
+
+                if read_type == 6: # Continuously poll every Read / Read-Multiple preset at its 'poll_period'
+                    json_preset_data = preset_store.data
+                    presets = get_read_presets(json_preset_data) + get_read_mult_presets(json_preset_data)
+                    report_by_exception = str(input("Only report values that changed? (y/n): ").lower()) == "y"
+                    data_logger = data_logger_input()
+                    presets_by_name = {preset["name"]: preset for preset in presets}
+
+                    def on_sample(name, values, timestamp):
+                        # Print typed values, log the raw registers
+                        preset = presets_by_name[name]
+                        print_poll_sample(name, values if preset_function_code(preset) in BIT_FUNCTION_CODES else decode_preset_values(preset, values), timestamp)
+                        if data_logger:
+                            data_logger.log(com_port, device_id, name, values, timestamp)
+
+                    engine = PollingEngine(read_instrument, baud, presets, on_sample=on_sample, cache=register_cache, report_by_exception=report_by_exception)
+                    print(f"{MENU_FMTCLR}Polling {len(presets)} presets - Estimated bus usage: {engine.bus_utilization():.0%} (Ctrl+C to stop){RESET}")
+                    try:
+                        engine.run()
+                    except KeyboardInterrupt:
+                        engine.stop()
+                    finally:
+                        if data_logger:
+                            data_logger.close()
+                    print(f"\n{GREEN}Polling stopped - Overruns: {engine.total_overruns()}{RESET}")
+
                 if read_type in (2, 4):  # Read Multiple contiguous registers using either user input(2), or preset data(4)
                     if read_type == 2:
 
@@ -277,27 +1193,890 @@ def read_registers(com_port, baud_rate: int, device_ID: int):
                         regReadCnt = int(preset_selection["read_count"])
                         preset_label = preset_selection["name"]
 
-                    # Subtract 1 from the designated start_register to account for 0 base Registers
-                    read_values = read_instrument.read_registers(start_register-1, regReadCnt, 3)
+                    width = 1
+                    if read_type == 2:
+                        # Subtract 1 from the designated start_register to account for 0 base Registers
+                        read_values = read_instrument.read_registers(start_register-1, regReadCnt, 3)
+                    elif read_type == 4:
+                        read_values = read_preset(read_instrument, preset_selection)
+                        width = 1 if preset_selection.get("data_type") == "bits" else DATA_TYPES[preset_selection.get("data_type", "uint16")][1]
 
                     if read_values:
                         print(f"\n{GREEN}Read Success: - {preset_label}{RESET}")
                         for idx, reg in enumerate(read_values, start=0):
-                            print(f"   {GREEN}{UNDERLINE}Register: {start_register + idx } - Value: {reg}{RESET}")
+                            print(f"   {GREEN}{UNDERLINE}Register: {start_register + idx * width} - Value: {reg}{RESET}")
+
+                if read_type == 7: # Read contiguous Input Registers (FC4)
+                    start_register = get_int_input("Start Register: ")
+                    regReadCnt = get_int_input("Number of contiguous input registers to read: ")
+                    # Subtract 1 from the designated start_register to account for 0 base Registers
+                    read_values = read_instrument.read_registers(start_register - 1, regReadCnt, 4)
+                    print(f"\n{GREEN}Read Success: - {READ_REG_OPTIONS[read_type - 1]}{RESET}")
+                    for idx, reg in enumerate(read_values, start=0):
+                        print(f"   {GREEN}{UNDERLINE}Register: {start_register + idx} - Value: {reg}{RESET}")
+
+                if read_type in (8, 9): # Read Coils (FC1) / Discrete Inputs (FC2) - up to MAX_BIT_READ_COUNT bits in one request
+                    function_code = 1 if read_type == 8 else 2
+                    start_address = get_int_input("Start Address: ")
+                    bit_count = get_int_input(f"Number of bits to read (max {MAX_BIT_READ_COUNT}): ")
+                    if bit_count not in range(1, MAX_BIT_READ_COUNT + 1):
+                        print(f"{RED}Bit count must be 1 - {MAX_BIT_READ_COUNT}.{RESET}")
+                        continue
+                    # Subtract 1 from the designated start address to account for 0 base addresses
+                    bits = unpack_bits(read_bit_block(read_instrument, start_address - 1, bit_count, function_code), bit_count)
+                    print(f"\n{GREEN}Read Success: - {READ_REG_OPTIONS[read_type - 1]}{RESET}")
+                    print_bits(start_address, bits)
+
+                if read_type == 10: # Full screen view of the selected presets, redrawn in place while they are polled
+                    json_preset_data = preset_store.data
+                    presets = get_read_presets(json_preset_data) + get_read_mult_presets(json_preset_data)
+                    print_menu_options([preset["name"] for preset in presets], base=1, label=f"{MENU_FMTCLR}Presets to watch:{RESET}")
+                    selection = input("Presets (comma separated, blank for all): ").strip()
+                    if selection:
+                        presets = [presets[int(item) - 1] for item in selection.split(",")]
+                    live_monitor(read_instrument, baud, presets)
 
                     
             elif read_type == r_menuLen:
                 # Break out of read_register loop
                 break
     
-    except minimalmodbus.NoResponseError:
-        logging.info(f"{RED}No Response error. Verify Modbus device configuration and register values.\n{RESET}")
+        except minimalmodbus.NoResponseError:
+            logging.info(f"{RED}No Response error. Verify Modbus device configuration and register values.\n{RESET}")
         
-    except minimalmodbus.ModbusException as e:
-        logging.info(f"{RED}Modbus error: {str(e)}\n{RESET}")
+        except minimalmodbus.ModbusException as e:
+            logging.info(f"{RED}Modbus error: {str(e)}\n{RESET}")
                      
-    except Exception as e:  
-        logging.info(f"{RED}{e}\n{RESET}")
+        except Exception as e:  
+            logging.info(f"{RED}{e}\n{RESET}")
+
+
+def plan_read_blocks(presets: list[dict], max_gap: int = READ_GAP_THRESHOLD, max_count: int = MAX_READ_COUNT):
+    """Merge Read / Read-Multiple presets into the fewest contiguous register blocks.\n
+    Presets closer together than 'max_gap' unused registers share a block, and no block exceeds 'max_count' registers.
+    Returns a list of (start_register, count) tuples using the same 1 based registers as the presets.
+    """
+    spans = []
+    for preset in presets:
+        start, count = preset_span(preset)
+        if count > 0:
+            spans.append((start, start + count - 1))
+
+    blocks = []
+    for start, end in sorted(spans):
+        if blocks:
+            block_start, block_end = blocks[-1]
+            # Extend the current block if the gap is small enough and the merged block still fits in one request
+            if start - block_end - 1 <= max_gap and max(end, block_end) - block_start + 1 <= max_count:
+                blocks[-1] = (block_start, max(end, block_end))
+                continue
+            # Skip the part of the span that the current block already covers
+            if start <= block_end:
+                start = block_end + 1
+                if start > end:
+                    continue
+        
+        # Split spans that are larger than a single request allows
+        while end - start + 1 > max_count:
+            blocks.append((start, start + max_count - 1))
+            start += max_count
+        blocks.append((start, end))
+
+    return [(block_start, block_end - block_start + 1) for block_start, block_end in blocks]
+
+
+def plan_preset_reads(presets: list[dict], max_gap: int = READ_GAP_THRESHOLD):
+    """plan_read_blocks() for each Modbus table the presets read from ('function_code').\n
+    Bit tables (FC1 / FC2) are merged through up to 16 x 'max_gap' unused bits and read up to MAX_BIT_READ_COUNT bits per frame.
+    Returns a list of (function_code, start_register, count) tuples.
+    """
+    reads = []
+    for function_code in sorted({preset_function_code(preset) for preset in presets}):
+        table_presets = [preset for preset in presets if preset_function_code(preset) == function_code]
+        if function_code in BIT_FUNCTION_CODES:
+            blocks = plan_read_blocks(table_presets, max_gap * BIT_READ_GAP_THRESHOLD // READ_GAP_THRESHOLD, MAX_BIT_READ_COUNT)
+        else:
+            blocks = plan_read_blocks(table_presets, max_gap)
+        reads.extend((function_code, start_register, count) for start_register, count in blocks)
+    return reads
+
+
+def read_all_presets(instrument, json_data, max_gap: int = READ_GAP_THRESHOLD):
+    """Read every Read / Read-Multiple preset using the blocks from plan_preset_reads().\n
+    Returns a dict of preset name -> value (Read presets) or list of values (Read-Multiple presets)
+    """
+    presets = get_read_presets(json_data) + get_read_mult_presets(json_data)
+    register_values = {} # (function_code, register) -> value
+
+    for function_code, start_register, count in plan_preset_reads(presets, max_gap):
+        # Subtract 1 from the designated start_register to account for 0 base Registers
+        if function_code in BIT_FUNCTION_CODES:
+            values = unpack_bits(read_bit_block(instrument, start_register - 1, count, function_code), count)
+        else:
+            values = instrument.read_registers(start_register - 1, count, function_code)
+        for idx, value in enumerate(values):
+            register_values[(function_code, start_register + idx)] = value
+
+    preset_values = {}
+    for preset in presets:
+        function_code = preset_function_code(preset)
+        start, count = preset_span(preset)
+        values = [register_values[(function_code, reg)] for reg in range(start, start + count)]
+        if function_code not in BIT_FUNCTION_CODES:
+            values = decode_preset_values(preset, values)
+        # Read presets hold a single value (unless decoded as "bits")
+        preset_values[preset["name"]] = values[0] if "start_register" not in preset and len(values) == 1 else values
+
+    return preset_values
+
+
+def preset_span(preset: dict):
+    """(start_register, register_count) read by a Read / Read-Multiple preset.\n
+    A Read preset covers one value of its 'data_type' (e.g. 2 registers for float32). 'read_count' is in registers,
+    or in bits for coil / discrete input presets.
+    """
+    if "start_register" in preset:
+        return int(preset["start_register"]), int(preset["read_count"])
+    if preset_function_code(preset) in BIT_FUNCTION_CODES:
+        return int(preset["register"]), 1
+    return int(preset["register"]), DATA_TYPES[preset.get("data_type", "uint16")][1]
+
+
+def preset_function_code(preset: dict):
+    """Read function code of a preset's Modbus table (see READ_TABLES). Presets without 'function_code' read holding registers."""
+    return int(preset.get("function_code", 3))
+
+
+def read_preset(instrument, preset: dict):
+    """Read one Read / Read-Multiple preset from its table.\n
+    Returns a list of 0 / 1 for coil / discrete input presets, or the decoded values for register presets.
+    """
+    function_code = preset_function_code(preset)
+    start, count = preset_span(preset)
+    # Subtract 1 from the designated start_register to account for 0 base Registers
+    if function_code in BIT_FUNCTION_CODES:
+        return unpack_bits(read_bit_block(instrument, start - 1, count, function_code), count)
+    return decode_preset_values(preset, instrument.read_registers(start - 1, count, function_code))
+
+
+def read_bit_block(instrument, address: int, count: int, function_code: int = 2):
+    """FC1 / FC2 read of 'count' bits from 0 based 'address', returned packed 8 per byte (LSB first, as on the wire).\n
+    Uses the transport's packed read when it has one (RtuTransport), otherwise packs minimalmodbus' read_bits() list.
+    """
+    if hasattr(instrument, "read_packed_bits"):
+        return instrument.read_packed_bits(address, count, function_code)
+    return pack_bits(instrument.read_bits(address, count, function_code))
+
+
+def print_bits(start_address: int, bits: list):
+    """Print bits 16 per row, labelled with the 1 based address of the first bit in the row."""
+    for idx in range(0, len(bits), 16):
+        row = bits[idx:idx + 16]
+        print(f"   {GREEN}Address: {start_address + idx:>5} - {start_address + idx + len(row) - 1:>5} - {' '.join(str(bit) for bit in row)}{RESET}")
+
+
+def decode_registers(registers: list, data_type: str = "uint16", word_order: str = "big", byte_order: str = "big", scale: float = 1, offset: float = 0):
+    """Decode a block of 16 bit registers into typed values in one pass.\n
+    'byte_order' is the byte order inside each register and 'word_order' the register order inside multi-register
+    values ("big" = most significant first, the Modbus default). Values are multiplied by 'scale' then 'offset'
+    is added. Trailing registers that don't fill a whole value are ignored. Uses NumPy when installed.
+    """
+    fmt, width = DATA_TYPES[data_type]
+    count = len(registers) // width
+    words = array("H", registers[:count * width])
+    
+    # Reorder registers inside each value so the most significant word is first
+    if word_order == "little" and width > 1:
+        swapped = array("H", words)
+        for idx in range(width):
+            swapped[idx::width] = words[width - 1 - idx::width]
+        words = swapped
+    
+    # array stores native order - swap to big endian bytes unless the device already sends little endian registers
+    if (sys.byteorder == "little") != (byte_order == "little"):
+        words.byteswap()
+    raw = words.tobytes()
+
+    numpy = optional_numpy()
+    if data_type == "bits":
+        if numpy is not None:
+            bits = numpy.unpackbits(numpy.frombuffer(raw, dtype=">u2").view(numpy.uint8).reshape(-1, 2)[:, ::-1], axis=1, bitorder="little")
+            return bits.reshape(-1, 16).tolist()
+        return [[(word >> bit) & 1 for bit in range(16)] for word in struct.unpack(f">{count}H", raw)]
+
+    if numpy is not None:
+        values = numpy.frombuffer(raw, dtype=numpy.dtype(f">{fmt}"))
+        if scale != 1 or offset != 0:
+            values = values * scale + offset
+        return values.tolist()
+    
+    values = struct.unpack(f">{count}{fmt}", raw)
+    if scale != 1 or offset != 0:
+        return [value * scale + offset for value in values]
+    return list(values)
+
+
+def decode_preset_values(preset: dict, registers: list):
+    """Decode 'registers' using the preset's 'data_type', 'word_order', 'byte_order', 'scale' and 'offset' (all optional)."""
+    if not any(key in preset for key in ("data_type", "word_order", "byte_order", "scale", "offset")):
+        return list(registers)
+    
+    return decode_registers(registers, preset.get("data_type", "uint16"), preset.get("word_order", "big"), preset.get("byte_order", "big"),
+                            float(preset.get("scale", 1)), float(preset.get("offset", 0)))
+
+
+def function_code_input(new_preset: dict):
+    """Prompt for the Modbus table a Read / Read-Multiple preset reads from. Holding Registers leave 'function_code' unset."""
+    tables = list(READ_TABLES)
+    print_menu_options([f"{name} (FC{function_code})" for function_code, name in READ_TABLES.items()], base=1, label=f"{MENU_FMTCLR}Table to read:{RESET}")
+    function_code = tables[get_int_input("Option: ") - 1]
+    if function_code != 3:
+        new_preset["function_code"] = function_code
+
+
+def typed_preset_input(new_preset: dict):
+    """Prompt for the optional data type fields of a Read / Read-Multiple preset."""
+    data_type = str(input(f"Data type {list(DATA_TYPES)} (blank for uint16): ")).strip()
+    if not data_type or data_type == "uint16":
+        return
+    if data_type not in DATA_TYPES:
+        raise ValueError(f"Unknown data type '{data_type}'")
+    
+    new_preset["data_type"] = data_type
+    if DATA_TYPES[data_type][1] > 1 and str(input("Least significant register first (word swapped)? (y/n): ").lower()) == "y":
+        new_preset["word_order"] = "little"
+    if data_type != "bits":
+        scale = str(input("Scale (blank for 1): ")).strip()
+        if scale:
+            new_preset["scale"] = float(scale)
+
+
+def poll_preset_input(new_preset: dict):
+    """Prompt for the optional polling fields of a Read / Read-Multiple preset. Blank answers keep the defaults.\n
+    Coil / discrete input presets only get 'poll_period' - they aren't cached, and any bit flip is reported as a change.
+    """
+    poll_period = str(input(f"Poll period in seconds (blank for {DEFAULT_POLL_PERIOD}): ")).strip()
+    if poll_period:
+        if float(poll_period) <= 0:
+            raise ValueError("Poll period must be greater than 0")
+        new_preset["poll_period"] = float(poll_period)
+    if preset_function_code(new_preset) in BIT_FUNCTION_CODES:
+        return
+    
+    for key, prompt, default in (("cache_ttl", "Cache TTL in seconds", DEFAULT_CACHE_TTL),
+                                 ("deadband", "Report-by-exception deadband", 0),
+                                 ("deadband_pct", "Report-by-exception deadband in %", 0)):
+        value = str(input(f"{prompt} (blank for {default}): ")).strip()
+        if value:
+            if float(value) < 0:
+                raise ValueError(f"{prompt} can't be negative")
+            new_preset[key] = float(value)
+
+
+class RegisterCache:
+    """Register values keyed by (port, device ID, register) with a TTL, plus report-by-exception change detection."""
+    def __init__(self):
+        self._values: dict[tuple, tuple] = {} # (port, device_id, function_code, register) -> (value, monotonic timestamp)
+        self._reported: dict[tuple, list] = {} # (port, device_id, name) -> last values passed on by changed()
+        self._lock = threading.Lock()
+
+    def read_registers(self, instrument, start_register: int, count: int, ttl: float = DEFAULT_CACHE_TTL, function_code: int = 3):
+        """Return 'count' values from 'start_register' (1 based). Served from memory if every value is younger than 'ttl'."""
+        keys = [(instrument.port, instrument.device_id, function_code, register) for register in range(start_register, start_register + count)]
+        now = time.monotonic()
+        with self._lock:
+            cached = [self._values.get(key) for key in keys]
+        
+        if all(entry is not None and now - entry[1] <= ttl for entry in cached):
+            return [entry[0] for entry in cached]
+
+        # Subtract 1 from the designated start_register to account for 0 base Registers
+        values = instrument.read_registers(start_register - 1, count, function_code)
+        now = time.monotonic()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._values[key] = (value, now)
+        
+        return values
+
+    def changed(self, instrument, name: str, values, deadband: float = 0, deadband_pct: float = 0):
+        """True if any value moved more than 'deadband' (absolute) and 'deadband_pct' (percent of the last reported value)
+        since the last time changed() returned True for this 'name'. The first call always reports.
+        Packed bits (bytes from read_bit_block()) are compared whole with one XOR - any bit flip is a change.
+        """
+        key = (instrument.port, instrument.device_id, name)
+        with self._lock:
+            reported = self._reported.get(key)
+            if isinstance(values, bytes):
+                if reported is not None and len(reported) == len(values) and not int.from_bytes(reported, "little") ^ int.from_bytes(values, "little"):
+                    return False
+                self._reported[key] = values
+                return True
+            
+            if reported is not None and len(reported) == len(values):
+                for old, new in zip(reported, values):
+                    delta = abs(new - old)
+                    if delta > deadband and delta > abs(old) * deadband_pct / 100:
+                        break
+                else:
+                    return False
+            
+            self._reported[key] = list(values)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._reported.clear()
+
+
+register_cache = RegisterCache() # Shared across menus and ports - keys include the port and device ID
+
+
+class PollTask:
+    """A Read / Read-Multiple preset scheduled at a fixed 'period'."""
+    def __init__(self, preset: dict, baud_rate: int, period: float):
+        self.name = preset["name"]
+        self.preset = preset
+        self.period = period
+        self.function_code = preset_function_code(preset)
+        self.blocks = [(start_register, count) for _, start_register, count in plan_preset_reads([preset])]
+        # Read request: 8 bytes. Response: 5 bytes + 2 per register, or 1 per 8 bits for coils / discrete inputs.
+        self.frame_time = sum(estimate_transaction_time(baud_rate, 8, 5 + ((count + 7) // 8 if self.function_code in BIT_FUNCTION_CODES else 2 * count))
+                              for _, count in self.blocks)
+        self.cache_ttl = min(float(preset.get("cache_ttl", DEFAULT_CACHE_TTL)), period) # Never serve values older than one period
+        self.deadband = float(preset.get("deadband", 0))
+        self.deadband_pct = float(preset.get("deadband_pct", 0))
+        self.overruns = 0
+        self.errors = 0
+
+
+class PollingEngine:
+    """Poll presets at their own rates on a single serial line.\n
+    Tasks are kept in a deadline queue (ties go to the shorter period). A task that falls more than one period
+    behind is counted as an overrun and rescheduled from 'now' instead of silently drifting.
+    With a RegisterCache, overlapping presets share fresh values, and 'report_by_exception' only passes samples
+    whose values moved beyond the preset's 'deadband' / 'deadband_pct' to 'on_sample'.
+    """
+    def __init__(self, instrument, baud_rate: int, presets: list[dict], on_sample=None, cache=None, report_by_exception: bool = False):
+        self.instrument = instrument
+        self.tasks = [PollTask(preset, baud_rate, float(preset.get("poll_period", DEFAULT_POLL_PERIOD))) for preset in presets]
+        self.on_sample = on_sample
+        self.cache = cache
+        self.report_by_exception = report_by_exception
+        self._stop_event = threading.Event()
+
+    def bus_utilization(self):
+        """Fraction of bus time the requested poll rates need. Above 1.0 the rates cannot be met."""
+        return sum(task.frame_time / task.period for task in self.tasks)
+
+    def total_overruns(self):
+        return sum(task.overruns for task in self.tasks)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self, duration: float | None = None):
+        """Poll until stop() is called or 'duration' seconds have passed."""
+        self._stop_event.clear()
+        if self.bus_utilization() > 1:
+            logging.warning(f"{RED}Requested poll rates need {self.bus_utilization():.0%} of the bus. Expect overruns.{RESET}")
+
+        start = time.monotonic()
+        schedule = [(start, task.period, idx, task) for idx, task in enumerate(self.tasks)]
+        heapq.heapify(schedule)
+
+        while schedule and not self._stop_event.is_set():
+            now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+
+            due, period, idx, task = schedule[0]
+            if due > now:
+                self._stop_event.wait(due - now)
+                continue
+            
+            heapq.heappop(schedule)
+            if now - due > task.period:
+                task.overruns += 1
+                logging.warning(f"{RED}Overrun: '{task.name}' is {now - due:.3f}s late for a {task.period}s period.{RESET}")
+                next_due = now + task.period
+            else:
+                next_due = due + task.period
+
+            self._poll(task)
+            heapq.heappush(schedule, (next_due, period, idx, task))
+
+    def _poll(self, task: PollTask):
+        values = []
+        try:
+            if task.function_code in BIT_FUNCTION_CODES:
+                # Bit blocks split at MAX_BIT_READ_COUNT (a multiple of 8), so the packed blocks join byte aligned
+                values = b"".join(read_bit_block(self.instrument, start_register - 1, count, task.function_code) for start_register, count in task.blocks)
+            else:
+                for start_register, count in task.blocks:
+                    if self.cache is not None:
+                        values.extend(self.cache.read_registers(self.instrument, start_register, count, task.cache_ttl, task.function_code))
+                    else:
+                        # Subtract 1 from the designated start_register to account for 0 base Registers
+                        values.extend(self.instrument.read_registers(start_register - 1, count, task.function_code))
+        
+        except PortDisconnectedError:
+            task.errors += 1 # The PortMonitor reports the disconnect / reconnect once, not on every poll
+            return
+        except (minimalmodbus.NoResponseError, minimalmodbus.ModbusException, SlaveDownError) as e:
+            task.errors += 1
+            logging.info(f"{RED}Poll error for '{task.name}': {e}{RESET}")
+            return
+        
+        if self.report_by_exception:
+            cache = self.cache if self.cache is not None else register_cache
+            # Deadbands are in engineering units, so registers are compared decoded. Packed bits are compared as is.
+            compared = values if isinstance(values, bytes) else decode_preset_values(task.preset, values)
+            if not cache.changed(self.instrument, task.name, compared, task.deadband, task.deadband_pct):
+                return
+
+        if isinstance(values, bytes):
+            values = unpack_bits(values, sum(count for _, count in task.blocks))
+        if self.on_sample:
+            self.on_sample(task.name, values, time.time())
+
+
+def print_poll_sample(name: str, values: list, timestamp: float):
+    """Default PollingEngine sample handler. Prints the preset name and its values."""
+    print(f"   {GREEN}{time.strftime('%H:%M:%S', time.localtime(timestamp))} - {name} - Value: {values[0] if len(values) == 1 else values}{RESET}")
+
+
+def preset_value_count(preset: dict):
+    """Number of values a Read / Read-Multiple preset decodes to."""
+    start, count = preset_span(preset)
+    if preset_function_code(preset) in BIT_FUNCTION_CODES:
+        return count
+    data_type = preset.get("data_type", "uint16")
+    if data_type == "bits":
+        return 16 * count
+    return count // DATA_TYPES[data_type][1]
+
+
+class LiveMonitor:
+    """Full screen view of preset values that redraws only the cells whose text changed.\n
+    Samples arrive from a PollingEngine thread through update() and only the latest one per preset is kept. render()
+    decodes those, and writes the changed cells with ANSI cursor addressing in one write. It is called at most
+    'refresh_rate' times a second, so the screen cost depends on the cells that changed, not on the poll rates.
+    Cells that don't fit in the terminal are counted in the header rather than drawn.
+    """
+    HEADER_ROWS = 2
+    VALUE_WIDTH = 12
+    MAX_LABEL_WIDTH = 32
+
+    def __init__(self, presets: list[dict], title: str = "", refresh_rate: float = MONITOR_REFRESH_RATE, stream=None):
+        self.presets = {preset["name"]: preset for preset in presets}
+        self.title = title
+        self.refresh_rate = refresh_rate
+        self.stream = stream or sys.stdout
+        self.samples = 0
+        self.status = ""
+        self._pending: dict[str, list] = {}
+        self._lock = threading.Lock()
+        
+        # One cell per decoded value: (name, value index) -> cell number
+        self.cells: dict[tuple, int] = {}
+        self.labels = []
+        for preset in presets:
+            value_count = preset_value_count(preset)
+            for idx in range(value_count):
+                self.cells[(preset["name"], idx)] = len(self.labels)
+                self.labels.append(preset["name"] if value_count == 1 else f"{preset['name']}[{idx}]")
+        self.shown = [None] * len(self.labels) # Text currently on screen per cell
+        
+        columns, lines = shutil.get_terminal_size()
+        self.label_width = min(max((len(label) for label in self.labels), default=0), self.MAX_LABEL_WIDTH)
+        self.cell_width = self.label_width + self.VALUE_WIDTH + 3
+        self.columns = max(1, columns // self.cell_width)
+        self.status_row = lines
+        self.visible = min(len(self.labels), self.columns * max(1, lines - self.HEADER_ROWS - 2))
+
+    def position(self, cell: int):
+        """1 based (row, column) of a cell's value field."""
+        return self.HEADER_ROWS + 1 + cell // self.columns, (cell % self.columns) * self.cell_width + self.label_width + 2
+
+    def update(self, name: str, values: list, timestamp: float):
+        """PollingEngine sample handler - keep the latest values until the next frame."""
+        with self._lock:
+            self._pending[name] = values
+            self.samples += 1
+
+    def draw_layout(self):
+        """Clear the screen (ANSI, no subprocess), hide the cursor and draw the header and every visible label."""
+        hidden = len(self.labels) - self.visible
+        out = ["\033[?25l\033[2J\033[H", f"{MENU_FMTCLR}{self.title}{RESET} (Ctrl+C to stop)"]
+        if hidden:
+            out.append(f" {RED}{hidden} values don't fit in the terminal{RESET}")
+        for cell in range(self.visible):
+            row, column = self.position(cell)
+            out.append(f"\033[{row};{column - self.label_width - 1}H{self.labels[cell][:self.label_width]:<{self.label_width}}")
+        self.stream.write("".join(out))
+        self.stream.flush()
+
+    def render(self):
+        """Redraw the cells whose text changed since the last frame. Returns the number of cells written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        
+        out = []
+        for name, values in pending.items():
+            preset = self.presets[name]
+            if preset_function_code(preset) not in BIT_FUNCTION_CODES:
+                values = decode_preset_values(preset, values)
+                if preset.get("data_type") == "bits":
+                    values = [bit for register_bits in values for bit in register_bits] # One cell per bit, as in preset_value_count()
+            for idx, value in enumerate(values):
+                cell = self.cells.get((name, idx))
+                if cell is None or cell >= self.visible:
+                    continue
+                text = f"{value:.6g}" if isinstance(value, float) else str(value)
+                if text != self.shown[cell]:
+                    self.shown[cell] = text
+                    row, column = self.position(cell)
+                    out.append(f"\033[{row};{column}H{GREEN}{text[:self.VALUE_WIDTH]:>{self.VALUE_WIDTH}}{RESET}")
+        
+        redrawn = len(out)
+        out.append(f"\033[{self.status_row};1H\033[K{self.status}")
+        self.stream.write("".join(out))
+        self.stream.flush()
+        return redrawn
+
+    def close(self):
+        """Show the cursor again and leave it below the view."""
+        self.stream.write(f"\033[{self.status_row};1H\033[?25h\n")
+        self.stream.flush()
+
+
+def live_monitor(instrument, baud_rate: int, presets: list[dict]):
+    """Poll 'presets' on a background thread and show them in a LiveMonitor until Ctrl+C."""
+    monitor = LiveMonitor(presets, title=f"Live Monitor - {instrument.port} - ID: {instrument.device_id}")
+    engine = PollingEngine(instrument, baud_rate, presets, on_sample=monitor.update, cache=register_cache)
+    thread = threading.Thread(target=engine.run, name="monitor-poll", daemon=True)
+    
+    logging.disable(logging.WARNING) # Poll errors / overruns would scroll the view - they are counted in the status line instead
+    monitor.draw_layout()
+    thread.start()
+    try:
+        while thread.is_alive():
+            frame_start = time.monotonic()
+            errors = sum(task.errors for task in engine.tasks)
+            monitor.status = (f"{RED if errors else GREEN}Samples: {monitor.samples} - Errors: {errors} - Overruns: {engine.total_overruns()}"
+                              f" - Bus usage: {engine.bus_utilization():.0%}{RESET}")
+            monitor.render()
+            time.sleep(max(0.0, 1 / monitor.refresh_rate - (time.monotonic() - frame_start)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        thread.join()
+        monitor.close()
+        logging.disable(logging.NOTSET)
+
+
+class DataLogger:
+    """Append-only sample logger running on its own thread so polling never waits on disk.\n
+    'csv' writes one row per sample: timestamp, port, device_id, name, value...\n
+    'binary' writes fixed-width BINARY_LOG_RECORD entries (one per value) and appends "id,port,name" lines to a
+    '.series' file beside it the first time each series is seen. Files rotate by size and age.
+    """
+    BINARY_LOG_RECORD = struct.Struct("<dHBHH") # timestamp, series id, device id, value index, value
+
+    def __init__(self, log_format: str = "csv", directory: str = LOGS_DIRPATH, max_bytes: int = LOG_ROTATE_BYTES, max_seconds: float = LOG_ROTATE_SECONDS):
+        self.log_format = log_format
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.dropped = 0
+        self._file_count = 0
+        self._queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name="data-logger", daemon=True)
+        os.makedirs(directory, exist_ok=True)
+        self._thread.start()
+
+    def log(self, com_port, device_id: int, name: str, values: list, timestamp: float):
+        """Queue a sample for writing. Never blocks - samples are dropped if the writer has fallen behind."""
+        try:
+            self._queue.put_nowait((timestamp, com_port, device_id, name, values))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+            self._series_file.close()
+        
+        extension = "csv" if self.log_format == "csv" else "bin"
+        self._file_count += 1
+        self.path = os.path.join(self.directory, f"modbus_{time.strftime('%Y%m%d_%H%M%S')}_{self._file_count:04d}.{extension}")
+        if self.log_format == "csv":
+            self._file = open(self.path, "a", newline="", buffering=1024 * 1024)
+            self._writer = csv.writer(self._file)
+        else:
+            self._file = open(self.path, "ab", buffering=1024 * 1024)
+        self._series_file = open(f"{self.path}.series", "a") if self.log_format != "csv" else open(os.devnull, "w")
+        self._series: dict[tuple, int] = {}
+        self._opened = time.monotonic()
+
+    def _write(self, timestamp: float, com_port, device_id: int, name: str, values: list):
+        if self.log_format == "csv":
+            self._writer.writerow([f"{timestamp:.6f}", com_port, device_id, name, *values])
+            return
+        
+        series_id = self._series.get((com_port, name))
+        if series_id is None:
+            series_id = self._series[(com_port, name)] = len(self._series)
+            self._series_file.write(f"{series_id},{com_port},{name}\n")
+            self._series_file.flush()
+        
+        self._file.write(b"".join(self.BINARY_LOG_RECORD.pack(timestamp, series_id, device_id, idx, value & 0xFFFF) for idx, value in enumerate(values)))
+
+    def _run(self):
+        self._open()
+        last_flush = time.monotonic()
+        while True:
+            try:
+                sample = self._queue.get(timeout=LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                sample = False
+            
+            if sample is None:
+                break
+            if sample:
+                self._write(*sample)
+
+            now = time.monotonic()
+            if now - last_flush >= LOG_FLUSH_INTERVAL:
+                self._file.flush()
+                last_flush = now
+                if self._file.tell() >= self.max_bytes or now - self._opened >= self.max_seconds:
+                    self._open()
+
+        self._file.close()
+        self._series_file.close()
+
+
+def data_logger_input():
+    """Prompt for a DataLogger output format. Returns a DataLogger, or None if logging is not wanted."""
+    print_menu_options(["No logging", "CSV", "Binary"], base=1, label=f"{MENU_FMTCLR}Log samples to '{LOGS_DIRPATH}':{RESET}")
+    option = get_int_input("Option: ")
+    if option == 2:
+        return DataLogger("csv")
+    if option == 3:
+        return DataLogger("binary")
+    return None
+
+
+class MultiPortPoller:
+    """Run one PollingEngine per COM port in its own worker thread.\n
+    Each port is an independent bus, so throughput scales with the number of ports. Samples from every port are
+    merged into the 'samples' queue as (port, device_id, name, values, timestamp) tuples.
+    """
+    def __init__(self, port_configs: list[tuple], presets: list[dict], cache=None, report_by_exception: bool = False):
+        self.port_configs = port_configs # List of (com_port, baud_rate, device_id)
+        self.presets = presets
+        self.cache = cache
+        self.report_by_exception = report_by_exception
+        self.samples = queue.Queue()
+        self.engines = []
+        self.threads = []
+
+    def start(self):
+        for com_port, baud_rate, device_id in self.port_configs:
+            instrument = connection_pool.get(com_port, baud_rate, device_id)
+            engine = PollingEngine(instrument, baud_rate, self.presets, on_sample=self._sample_handler(com_port, device_id),
+                                   cache=self.cache, report_by_exception=self.report_by_exception)
+            thread = threading.Thread(target=engine.run, name=f"poll-{com_port}", daemon=True)
+            self.engines.append(engine)
+            self.threads.append(thread)
+            thread.start()
+
+    def _sample_handler(self, com_port, device_id: int):
+        def on_sample(name, values, timestamp):
+            self.samples.put((com_port, device_id, name, values, timestamp))
+        return on_sample
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def stop(self):
+        for engine in self.engines:
+            engine.stop()
+        for thread in self.threads:
+            thread.join()
+
+
+def select_multiple_com_devices(com_devices: list, display_items: list = []):
+    """Prompt for a comma separated list of COM ports. A blank entry selects every port."""
+    print_menu_options(display_items or com_devices, base=1, label=f"\n{MENU_FMTCLR}Available COM Ports:{RESET}")
+    while True:
+        selection = input("Select COM Ports (comma separated, blank for all): ").strip()
+        if not selection:
+            return list(com_devices)
+        try:
+            indexes = [int(item) - 1 for item in selection.split(",")]
+            if all(idx in range(0, len(com_devices)) for idx in indexes):
+                return [com_devices[idx] for idx in indexes]
+        except ValueError:
+            pass
+        print(f"{RED}Invalid Input.{RESET}")
+
+
+def multi_port_polling(baud_rate: int, device_ID: int):
+    """Menu handler - poll the Read / Read-Multiple presets on several COM ports at once."""
+    com_devices, menu_items = list_serial_ports()
+    if not com_devices:
+        print(f"{RED}No COM devices found. Returning to Main Menu{RESET}")
+        return
+    
+    ports = select_multiple_com_devices(com_devices, menu_items)
+    port_configs = []
+    same_settings = baud_rate and device_ID and str(input(f"Use Baud: {baud_rate} - ID: {device_ID} for every port? (y/n): ").lower()) == "y"
+    for com_port in ports:
+        if same_settings:
+            port_configs.append((com_port, baud_rate, device_ID))
+        else:
+            print(f"\n{MENU_FMTCLR}Settings for {com_port}{RESET}")
+            port_configs.append((com_port, baud_input(), device_id_input()))
+
+    json_preset_data = preset_store.data
+    presets = get_read_presets(json_preset_data) + get_read_mult_presets(json_preset_data)
+    report_by_exception = str(input("Only report values that changed? (y/n): ").lower()) == "y"
+    data_logger = data_logger_input()
+    poller = MultiPortPoller(port_configs, presets, cache=register_cache, report_by_exception=report_by_exception)
+    print(f"{MENU_FMTCLR}Polling {len(presets)} presets on {len(port_configs)} ports (Ctrl+C to stop){RESET}")
+    poller.start()
+    try:
+        while poller.is_running():
+            try:
+                com_port, device_id, name, values, timestamp = poller.samples.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            print(f"   {GREEN}{time.strftime('%H:%M:%S', time.localtime(timestamp))} - {com_port} - ID: {device_id} - {name} - Value: {values[0] if len(values) == 1 else values}{RESET}")
+            if data_logger:
+                data_logger.log(com_port, device_id, name, values, timestamp)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.stop()
+        if data_logger:
+            data_logger.close()
+    print(f"\n{GREEN}Polling stopped - Overruns: {sum(engine.total_overruns() for engine in poller.engines)}{RESET}")
+
+
+def probe_device(instrument, device_id: int):
+    """Send a single register read to 'device_id'.\n
+    Returns 'ok' for a normal response, 'exception' for a Modbus exception response (device present),
+    'garbage' for a garbled / CRC error response, or None if nothing answered.
+    """
+    try:
+        instrument.address = device_id
+        instrument.read_register(0, 0, 3)
+        return "ok"
+    
+    except minimalmodbus.NoResponseError:
+        return None
+    
+    except minimalmodbus.SlaveReportedException:
+        return "exception"
+    
+    except minimalmodbus.ModbusException:
+        if instrument.serial is not None:
+            instrument.serial.reset_input_buffer()
+        return "garbage"
+
+
+def scan_port(com_port, baud_rates: list = DISCOVERY_BAUD_ORDER, device_ids=range(1, 255), all_bauds: bool = False):
+    """Probe every device ID at each baud rate on 'com_port'.\n
+    The timeout for each probe is derived from the frame time at the baud rate. A baud rate is abandoned after
+    DISCOVERY_GARBAGE_LIMIT garbled responses, and the scan stops at the first baud rate with responding devices
+    unless 'all_bauds' is set. Returns a list of (com_port, baud_rate, device_id, status) tuples.
+    """
+    found = []
+    for baud_rate in baud_rates:
+        connection = connection_pool.get(com_port, baud_rate, 1).connection
+        instrument = connection.instrument
+        garbage = 0
+        
+        with connection.lock:
+            default_timeout = instrument.serial.timeout
+            # FC3 single register probe: 8 byte request, 7 byte response
+            instrument.serial.timeout = estimate_transaction_time(baud_rate, 8, 7) + DISCOVERY_TIMEOUT_MARGIN
+            try:
+                for device_id in device_ids:
+                    status = probe_device(instrument, device_id)
+                    if status == "garbage":
+                        garbage += 1
+                        if garbage >= DISCOVERY_GARBAGE_LIMIT:
+                            logging.info(f"{RED}{com_port} - Baud: {baud_rate} - Too many garbled responses. Skipping baud rate.{RESET}")
+                            break
+                    elif status:
+                        found.append((com_port, baud_rate, device_id, status))
+            finally:
+                instrument.serial.timeout = default_timeout
+        
+        logging.info(f"{com_port} - Baud: {baud_rate} - Scan complete. {len(found)} device(s) found.")
+        if found and not all_bauds:
+            break
+
+    return found
+
+
+def discover_devices(com_ports: list, baud_rates: list = DISCOVERY_BAUD_ORDER, all_bauds: bool = False):
+    """Run scan_port() on every COM port in parallel. Returns the combined list of responding devices."""
+    if not com_ports:
+        return []
+    
+    def scan(com_port):
+        # One port that can't be opened (e.g. held by another process) must not discard the other ports' results
+        try:
+            return scan_port(com_port, baud_rates, all_bauds=all_bauds)
+        except Exception as e:
+            logging.info(f"{RED}Could not scan '{com_port}' - {e}{RESET}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=len(com_ports)) as executor:
+        results = executor.map(scan, com_ports)
+    
+    return [device for port_result in results for device in port_result]
+
+
+def discover_devices_menu():
+    """Menu handler - Scan every COM port for responding devices and optionally select one.\n
+    Returns the selected (com_port, baud_rate, device_id) or None
+    """
+    com_devices, menu_items = list_serial_ports()
+    if not com_devices:
+        print(f"{RED}No COM devices found. Returning to Main Menu{RESET}")
+        return None
+    
+    all_bauds = str(input("Scan every baud rate? (n = stop at the first baud rate with responding devices) (y/n): ").lower()) == "y"
+    connection_pool.close()
+    start = time.monotonic()
+    found = discover_devices(com_devices, all_bauds=all_bauds)
+    print(f"\n{MENU_FMTCLR}Discovered Devices ({time.monotonic() - start:.1f}s):{RESET}")
+    
+    if not found:
+        print(f"{RED}No responding devices found.{RESET}")
+        return None
+
+    print_menu_options([f"{com_port} - Baud: {baud_rate} - ID: {device_id} - Response: {status}" for com_port, baud_rate, device_id, status in found], base=1)
+    print(f"{len(found) + 1}: Back to Main Menu")
+    option = get_int_input("Use device: ")
+    if option in range(1, len(found) + 1):
+        com_port, baud_rate, device_id, _ = found[option - 1]
+        return com_port, baud_rate, device_id
+    
+    return None
 
 
 def write_register(com_port, baud_rate, device_ID):
@@ -308,10 +2087,10 @@ def write_register(com_port, baud_rate, device_ID):
         print(f"{RED}Bypass mode active. No COM device to Write with. Returning to Main Menu{RESET}")
         return
     
-    write_instrument = create_virtual_device(com_port, baud, device_id)  # Create a minimal modbus Instrument instance
+    write_instrument = connection_pool.get(com_port, baud, device_id)  # Get a pooled Instrument view for this device
 
-    try:
-        while True:
+    while True:
+        try:
             print_menu_options(
                 WRITE_REG_OPTIONS,
                 base=1,
@@ -330,7 +2109,7 @@ def write_register(com_port, baud_rate, device_ID):
 
 
                 elif write_type == 2:
-                    preset_data = load_json(PRESETS_FILEPATH)
+                    preset_data = preset_store.data
                     write_presets = get_write_presets(preset_data)
                     print(f"\n{MENU_FMTCLR}Write Presets:{RESET}")
                     for i, preset in enumerate(write_presets, start=1):
@@ -348,19 +2127,200 @@ def write_register(com_port, baud_rate, device_ID):
                     print(f"   {GREEN}{UNDERLINE}Wrote value: '{preset_write_value}' to Register: {preset_reg}{RESET}")        
 
                     
+                elif write_type == 3:
+                    write_presets = write_preset_group_input()
+                    verify = str(input("Verify by reading back the written registers? (y/n): ").lower()) == "y"
+                    mismatches = apply_write_presets(write_instrument, write_presets, verify)
+                    print(f"\n{GREEN}Write Success - {len(write_presets)} presets in {len(plan_write_blocks(write_presets))} requests{RESET}")
+                    if verify and not mismatches:
+                        print(f"   {GREEN}{UNDERLINE}Verified: all registers match{RESET}")
+                    for register, expected, actual in mismatches:
+                        print(f"   {RED}Verify failed - Register: {register} - Expected: {expected} - Read: {actual}{RESET}")
+
+                elif write_type == 4:
+                    provision_fleet_menu(com_port, baud)
+
                 elif write_type == wr_menuLen:
                     # Break out of write_register loop
                     break
                     
     
-    except minimalmodbus.NoResponseError:
-        logging.info(f"{RED}No Response error. Verify Modbus device configuration and register values.\n{RESET}")
+        except minimalmodbus.NoResponseError:
+            logging.info(f"{RED}No Response error. Verify Modbus device configuration and register values.\n{RESET}")
         
-    except minimalmodbus.ModbusException as e:
-        logging.info(f"{RED}Modbus error: {str(e)}\n{RESET}")
+        except minimalmodbus.ModbusException as e:
+            logging.info(f"{RED}Modbus error: {str(e)}\n{RESET}")
                     
-    except Exception as e:  
-        logging.info(f"{RED}{e}\n{RESET}")
+        except Exception as e:  
+            logging.info(f"{RED}{e}\n{RESET}")
+
+
+def plan_write_blocks(presets: list[dict], max_count: int = MAX_WRITE_COUNT):
+    """Merge Write presets with contiguous registers into multi-register blocks.\n
+    If a register appears more than once the last preset wins. No block exceeds 'max_count' registers.
+    Returns a list of (start_register, [values]) tuples using the same 1 based registers as the presets.
+    """
+    register_values = {int(preset["register"]): int(preset["value"]) for preset in presets}
+    
+    blocks = []
+    for register in sorted(register_values):
+        if blocks and blocks[-1][0] + len(blocks[-1][1]) == register and len(blocks[-1][1]) < max_count:
+            blocks[-1][1].append(register_values[register])
+        else:
+            blocks.append((register, [register_values[register]]))
+    
+    return blocks
+
+
+def apply_write_presets(instrument, presets: list[dict], verify: bool = False):
+    """Write every preset in 'presets' using Function Code 16 blocks from plan_write_blocks().\n
+    If 'verify' is set the registers are read back with coalesced reads from plan_read_blocks().
+    Returns a list of (register, expected, actual) tuples for registers that did not match.
+    """
+    blocks = plan_write_blocks(presets)
+    for start_register, values in blocks:
+        # Subtract 1 from the designated start_register to account for 0 base Registers
+        instrument.write_registers(start_register - 1, values)
+
+    if not verify:
+        return []
+    return verify_write_blocks(instrument, blocks)
+
+
+def verify_write_blocks(instrument, blocks: list):
+    """Read back plan_write_blocks() 'blocks' with coalesced reads. Returns (register, expected, actual) for mismatches."""
+    expected = {start_register + idx: value for start_register, values in blocks for idx, value in enumerate(values)}
+    actual = {}
+    for start_register, count in plan_read_blocks([{"start_register": start, "read_count": len(values)} for start, values in blocks]):
+        for idx, value in enumerate(instrument.read_registers(start_register - 1, count, 3)):
+            actual[start_register + idx] = value
+
+    return [(register, value, actual[register]) for register, value in expected.items() if actual[register] != value]
+
+
+def write_preset_group_input():
+    """Prompt for a write preset group. Returns the matching write presets (every write preset for "All")."""
+    write_presets = get_write_presets(preset_store.data)
+    groups = sorted({preset["group"] for preset in write_presets if preset.get("group")})
+    print_menu_options(["All Write Presets"] + groups, base=1, label=f"\n{MENU_FMTCLR}Write Preset Groups:{RESET}")
+    option = get_int_input("Option: ") - 1
+    if option > 0:
+        write_presets = [preset for preset in write_presets if preset.get("group") == groups[option - 1]]
+    return write_presets
+
+
+def parse_id_list(text: str):
+    """Parse device IDs like "1-60,65,70-72" into a sorted list."""
+    device_ids = set()
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-")
+            device_ids.update(range(int(first), int(last) + 1))
+        elif part:
+            device_ids.add(int(part))
+    
+    if not all(device_id in range(1, 255) for device_id in device_ids):
+        raise ValueError("Device IDs must be 1-254")
+    return sorted(device_ids)
+
+
+def provision_job_hash(blocks: list):
+    """Short hash of the planned write blocks, so a resume only skips devices that got the same registers and values."""
+    return hashlib.sha1(json.dumps(blocks).encode()).hexdigest()[:12]
+
+
+def load_provision_log(log_path: str = PROVISION_LOG_FILEPATH, job: str | None = None):
+    """(port, device ID) pairs already provisioned successfully according to 'log_path'.
+    With 'job', only entries written by a run with the same provision_job_hash() count.
+    """
+    done = set()
+    if os.path.exists(log_path):
+        with open(log_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("status") == "ok" and (job is None or entry.get("job") == job):
+                    done.add((entry["port"], entry["device_id"]))
+    return done
+
+
+def provision_fleet(targets: dict, baud_rate: int, presets: list[dict], verify: bool = True, log_path: str = PROVISION_LOG_FILEPATH, on_progress=None):
+    """Apply 'presets' to every device ID in 'targets' ({port: [device IDs]}), one worker thread per port.\n
+    On each bus every device is written first and then every device is verified, so devices apply their new
+    settings while the others are being written. Each device result is appended to 'log_path' as a JSON line,
+    and devices already logged as "ok" for the same write blocks are skipped so an interrupted run can be resumed.
+    'on_progress(result, done, total)' is called after each device.
+    """
+    blocks = plan_write_blocks(presets)
+    job = provision_job_hash(blocks)
+    done = load_provision_log(log_path, job)
+    pending = {com_port: [device_id for device_id in device_ids if (com_port, device_id) not in done] for com_port, device_ids in targets.items()}
+    total = sum(len(device_ids) for device_ids in pending.values())
+    results = []
+    lock = threading.Lock()
+
+    def finish(result: dict):
+        result["job"] = job
+        result["timestamp"] = time.time()
+        with lock:
+            results.append(result)
+            with open(log_path, "a") as f:
+                f.write(json.dumps(result) + "\n")
+            if on_progress:
+                on_progress(result, len(results), total)
+
+    def provision_port(com_port):
+        written = []
+        for device_id in pending[com_port]:
+            instrument = connection_pool.get(com_port, baud_rate, device_id)
+            try:
+                for start_register, values in blocks:
+                    # Subtract 1 from the designated start_register to account for 0 base Registers
+                    instrument.write_registers(start_register - 1, values)
+            except Exception as e:
+                finish({"port": com_port, "device_id": device_id, "status": "write_failed", "error": f"{type(e).__name__}: {e}"})
+                continue
+            if verify:
+                written.append(device_id)
+            else:
+                finish({"port": com_port, "device_id": device_id, "status": "ok"})
+
+        for device_id in written:
+            instrument = connection_pool.get(com_port, baud_rate, device_id)
+            try:
+                mismatches = verify_write_blocks(instrument, blocks)
+            except Exception as e:
+                finish({"port": com_port, "device_id": device_id, "status": "verify_failed", "error": f"{type(e).__name__}: {e}"})
+                continue
+            finish({"port": com_port, "device_id": device_id, "status": "mismatch" if mismatches else "ok", "mismatches": mismatches})
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        list(executor.map(provision_port, pending))
+    
+    return results
+
+
+def provision_fleet_menu(com_port, baud_rate: int):
+    """Menu handler - Apply a write preset group to a list / range of device IDs on one or more COM ports."""
+    presets = write_preset_group_input()
+    com_devices, menu_items = list_serial_ports()
+    ports = [com_port] if str(input(f"Use only {com_port}? (n = select COM Ports) (y/n): ").lower()) == "y" else select_multiple_com_devices(com_devices, menu_items)
+    device_ids = parse_id_list(input("Device IDs (e.g. 1-60,65): "))
+    verify = str(input("Verify each device by reading back the written registers? (y/n): ").lower()) == "y"
+    if str(input(f"Resume from '{PROVISION_LOG_FILEPATH}' (skip devices already done)? (y/n): ").lower()) != "y" and os.path.exists(PROVISION_LOG_FILEPATH):
+        os.remove(PROVISION_LOG_FILEPATH)
+
+    def on_progress(result: dict, done: int, total: int):
+        color = GREEN if result["status"] == "ok" else RED
+        print(f"   {color}[{done}/{total}] {result['port']} - ID: {result['device_id']} - {result['status']} {result.get('error', '')}{RESET}")
+
+    start = time.monotonic()
+    results = provision_fleet({port: device_ids for port in ports}, baud_rate, presets, verify, on_progress=on_progress)
+    failed = [result for result in results if result["status"] != "ok"]
+    print(f"\n{GREEN if not failed else RED}Provisioned {len(results) - len(failed)} of {len(results)} devices in {time.monotonic() - start:.1f}s. Failed: {len(failed)}{RESET}")
 
 
 def save_json(file_path: str, new_data):
@@ -403,6 +2363,153 @@ def get_write_presets(json_write_data):
     return write_presets
 
 
+class PresetStore:
+    """In-memory presets loaded once, indexed by name, with incremental persistence.\n
+    Changes are appended to PRESETS_JOURNAL_FILEPATH as single JSON lines and replayed on load. The journal is
+    compacted into "presets.json" (written to a temp file, then atomically replaced) once it reaches
+    PRESET_JOURNAL_COMPACT entries, and on exit.
+    Each compaction bumps the "generation" saved in "presets.json" and journal entries carry the generation they
+    apply to, so a journal left behind by a crash between the replace and the journal removal is skipped, not replayed twice.
+    """
+    PRESET_KEYS = ("read_presets", "read_multiple_presets", "write_presets")
+
+    def __init__(self, file_path: str = PRESETS_FILEPATH, journal_path: str = PRESETS_JOURNAL_FILEPATH):
+        self.file_path = file_path
+        self.journal_path = journal_path
+        self._data = None
+        self._journal_entries = 0
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    @property
+    def data(self):
+        """The presets dict in the same shape as "presets.json". Loaded on first use."""
+        if self._data is None:
+            self.load()
+        return self._data
+
+    def load(self):
+        with self._lock:
+            self._data = load_json(self.file_path)
+            for preset_key in self.PRESET_KEYS:
+                self._data.setdefault(preset_key, [])
+                for preset in self._data[preset_key]:
+                    normalize_preset(preset)
+            
+            self._journal_entries = 0
+            self._generation = int(self._data.get("generation", 0))
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "r") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            break # Partially written last entry - everything before it is intact
+                        if entry.get("generation", 0) != self._generation:
+                            continue # Already compacted into "presets.json"
+                        self._apply(entry)
+                        self._journal_entries += 1
+            
+            self._build_indexes()
+            if self._journal_entries >= PRESET_JOURNAL_COMPACT:
+                self.compact()
+
+    def _build_indexes(self):
+        self._by_name: dict[str, list] = {}
+        for preset_key in self.PRESET_KEYS:
+            for preset in self._data[preset_key]:
+                self._index(preset)
+
+    def _index(self, preset: dict):
+        self._by_name.setdefault(preset["name"], []).append(preset)
+
+    def _unindex(self, preset: dict):
+        matches = self._by_name.get(preset["name"], [])
+        for idx, indexed in enumerate(matches):
+            if indexed is preset:
+                del matches[idx]
+                break
+        if preset["name"] in self._by_name and not matches:
+            del self._by_name[preset["name"]]
+
+    def _apply(self, entry: dict):
+        presets = self._data[entry["key"]]
+        if entry["op"] == "add":
+            presets.append(normalize_preset(entry["preset"]))
+        elif entry["op"] == "update":
+            presets[entry["index"]] = normalize_preset(entry["preset"])
+        elif entry["op"] == "delete":
+            presets.pop(entry["index"])
+
+    def _journal(self, entry: dict):
+        entry["generation"] = self._generation
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        
+        self._journal_entries += 1
+        if self._journal_entries >= PRESET_JOURNAL_COMPACT:
+            self.compact()
+
+    def get(self, preset_key: str):
+        """The live list of presets for 'preset_key' (read_presets / read_multiple_presets / write_presets)."""
+        return self.data[preset_key]
+
+    def find_by_name(self, name: str):
+        if self._data is None:
+            self.load()
+        return list(self._by_name.get(name, []))
+
+    def add(self, preset_key: str, preset: dict):
+        with self._lock:
+            normalize_preset(preset)
+            self.data[preset_key].append(preset)
+            self._index(preset)
+            self._journal({"op": "add", "key": preset_key, "preset": preset})
+
+    def update(self, preset_key: str, index: int, preset: dict):
+        with self._lock:
+            normalize_preset(preset)
+            self._unindex(self.data[preset_key][index])
+            self.data[preset_key][index] = preset
+            self._index(preset)
+            self._journal({"op": "update", "key": preset_key, "index": index, "preset": preset})
+
+    def delete(self, preset_key: str, index: int):
+        with self._lock:
+            preset = self.data[preset_key].pop(index)
+            self._unindex(preset)
+            self._journal({"op": "delete", "key": preset_key, "index": index})
+            return preset
+
+    def compact(self):
+        """Write the full presets to "presets.json" atomically and clear the journal."""
+        with self._lock:
+            if self._data is None or self._journal_entries == 0:
+                return
+            
+            self._data["generation"] = self._generation + 1
+            temp_path = f"{self.file_path}.tmp"
+            save_json(temp_path, self._data)
+            os.replace(temp_path, self.file_path)
+            self._generation += 1 # From here the journal's entries are stale, even if removing it fails
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_entries = 0
+
+
+def normalize_preset(preset: dict):
+    """Convert the PRESET_INT_KEYS fields of 'preset' to int in place ("presets.json" mixes "70" and 70)."""
+    for key in PRESET_INT_KEYS:
+        if key in preset:
+            preset[key] = int(preset[key])
+    return preset
+
+
+preset_store = PresetStore()
+
+
 def get_int_input(prompt: str):
     while True:
         user_input = input(prompt)
@@ -418,10 +2525,10 @@ def get_int_input(prompt: str):
 
 
 def presetRegConfig_handler():
-    json_data = load_json(PRESETS_FILEPATH)
-    read_presets: list[dict] = get_read_presets(json_data)
-    readMult_presets: list[dict] = get_read_mult_presets(json_data)
-    write_presets: list[dict] = get_write_presets(json_data)
+    # Live preset lists - PresetStore keeps them up to date on add / modify / delete
+    read_presets: list[dict] = preset_store.get("read_presets")
+    readMult_presets: list[dict] = preset_store.get("read_multiple_presets")
+    write_presets: list[dict] = preset_store.get("write_presets")
     
     # Add / Modify Preset Type selection loop
     while True:
@@ -441,14 +2548,24 @@ def presetRegConfig_handler():
                 # Handle creation of 'read' PRESET data
                 if new_preset_type == 1:
                     new_preset['type'] = 'read'
+                    function_code_input(new_preset)
                     new_preset["register"] = get_int_input("Enter register address to read: ")
+                    if preset_function_code(new_preset) not in BIT_FUNCTION_CODES:
+                        typed_preset_input(new_preset)
+                    poll_preset_input(new_preset)
                     preset_key = "read_presets"
 
                 # Handle creation of 'read_multiple' PRESET data
                 elif new_preset_type == 2:
                     new_preset['type'] = 'read_multiple'
+                    function_code_input(new_preset)
                     new_preset["start_register"] = get_int_input("Start Register: ")
-                    new_preset["read_count"] = get_int_input("Registers to read: ")
+                    if preset_function_code(new_preset) in BIT_FUNCTION_CODES:
+                        new_preset["read_count"] = get_int_input("Bits to read: ")
+                    else:
+                        new_preset["read_count"] = get_int_input("Registers to read: ")
+                        typed_preset_input(new_preset)
+                    poll_preset_input(new_preset)
                     preset_key = "read_multiple_presets"
 
                 # Handle creation of 'write' PRESET data
@@ -456,18 +2573,15 @@ def presetRegConfig_handler():
                     new_preset['type'] = 'write'
                     new_preset["register"] = get_int_input("Enter register address to write to: ")
                     new_preset["value"] = get_int_input("Enter value to write: ")
+                    group = str(input("Preset group for 'Apply Write Preset Group' (blank for none): ")).strip()
+                    if group:
+                        new_preset["group"] = group
                     preset_key = "write_presets"
 
                 # Append and save
-                json_data[preset_key].append(new_preset)
-                save_json(PRESETS_FILEPATH, json_data)
+                preset_store.add(preset_key, new_preset)
 
                 print(f"{GREEN}Preset added successfully.\n{RESET}")
-                # Reload the presets.json data to reflect changes
-                json_data = load_json(PRESETS_FILEPATH)
-                read_presets = get_read_presets(json_data)
-                readMult_presets = get_read_mult_presets(json_data)
-                write_presets = get_write_presets(json_data)
                 
             # Modify / Delete existing Read(4) / Read Multiple(5) / Write(6) Presets
             elif preset_option in range(4, 7):
@@ -513,22 +2627,8 @@ def presetRegConfig_handler():
                             if option == del_option:
                                 confirm = str(input(f"{BOLD}Are you sure you want to delete this preset? (y/n): {RESET}").lower())
                                 if confirm == "y":
-                                    deleted = json_data[preset_key].pop(preset_selection - 1)
-                                    save_json(PRESETS_FILEPATH, json_data)
+                                    deleted = preset_store.delete(preset_key, preset_selection - 1)
                                     print(f"{GREEN}Preset '{deleted['name']}' deleted.\n{RESET}")
-
-                                    # Reload the presets.json data to reflect changes
-                                    json_data = load_json(PRESETS_FILEPATH)
-                                    read_presets = get_read_presets(json_data)
-                                    readMult_presets = get_read_mult_presets(json_data)
-                                    write_presets = get_write_presets(json_data)
-                                    if preset_key == "read_presets":
-                                        presets_list = read_presets
-                                    elif preset_key == "read_multiple_presets":
-                                        presets_list = readMult_presets
-                                    elif preset_key == "write_presets":
-                                        presets_list = write_presets
-                                        
                                     break
                                 else:
                                     print(f"{RED}Delete Cancelled.\n{RESET}")
@@ -544,10 +2644,10 @@ def presetRegConfig_handler():
                                 if key_to_edit != 'type':
                                     old_value = preset[key_to_edit]
                                     new_value = input(f"Enter new value for '{key_to_edit}' (current: {old_value}): ")
-                                    preset[key_to_edit] = new_value
-                                    json_data[preset_key][preset_selection - 1] = preset
-                                    save_json(PRESETS_FILEPATH, json_data)
-                                    print(f"{GREEN}Preset '{preset['name']}' updated.\n{RESET}")
+                                    updated_preset = dict(preset)
+                                    updated_preset[key_to_edit] = new_value
+                                    preset_store.update(preset_key, preset_selection - 1, updated_preset)
+                                    print(f"{GREEN}Preset '{updated_preset['name']}' updated.\n{RESET}")
                                     break
                                 
                                 # Restrict ability to modify the 'type'
@@ -613,6 +2713,849 @@ def modify_mb_connection(baud_rate: int, device_id: int):
             
     
 
+class RegisterSnapshot:
+    """Holding register values for a contiguous 1 based address range, backed by arrays.\n
+    'valid' holds 1 for registers that were read and 0 for illegal address holes.
+    File layout: SNAPSHOT_HEADER, then the valid flags packed 8 per byte, then the values as little endian uint16.
+    """
+    SNAPSHOT_HEADER = struct.Struct("<4sHHII") # magic, version, device ID, start register, register count
+    MAGIC = b"MBSN"
+
+    def __init__(self, start_register: int, count: int, device_id: int = 0):
+        self.start_register = start_register
+        self.device_id = device_id
+        self.values = array("H", bytes(2 * count))
+        self.valid = bytearray(count)
+
+    def __len__(self):
+        return len(self.values)
+
+    def registers(self):
+        """(register, value) pairs for every valid register."""
+        return [(self.start_register + idx, value) for idx, value in enumerate(self.values) if self.valid[idx]]
+
+    def save(self, file_path: str):
+        values = array("H", self.values)
+        if sys.byteorder != "little":
+            values.byteswap()
+        with open(file_path, "wb") as f:
+            f.write(self.SNAPSHOT_HEADER.pack(self.MAGIC, 1, self.device_id, self.start_register, len(self)))
+            f.write(pack_bits(self.valid))
+            values.tofile(f)
+
+    @classmethod
+    def load(cls, file_path: str):
+        with open(file_path, "rb") as f:
+            magic, _, device_id, start_register, count = cls.SNAPSHOT_HEADER.unpack(f.read(cls.SNAPSHOT_HEADER.size))
+            if magic != cls.MAGIC:
+                raise ValueError(f"'{file_path}' is not a register snapshot file")
+            
+            snapshot = cls(start_register, count, device_id)
+            flags = f.read((count + 7) // 8)
+            snapshot.valid = bytearray((flags[idx // 8] >> (idx % 8)) & 1 for idx in range(count))
+            snapshot.values = array("H")
+            snapshot.values.fromfile(f, count)
+            if sys.byteorder != "little":
+                snapshot.values.byteswap()
+        return snapshot
+
+
+def take_snapshot(instrument, start_register: int, end_register: int, max_count: int = MAX_READ_COUNT):
+    """Read registers 'start_register' - 'end_register' (1 based, inclusive) in max size FC3 chunks.\n
+    A chunk rejected as an illegal request is split in half until the illegal registers are isolated and
+    left as holes (valid = 0) in the returned RegisterSnapshot.
+    """
+    snapshot = RegisterSnapshot(start_register, end_register - start_register + 1, getattr(instrument, "device_id", 0))
+
+    def sweep(start: int, count: int):
+        try:
+            # Subtract 1 from the designated start_register to account for 0 base Registers
+            block = instrument.read_registers(start - 1, count, 3)
+        except minimalmodbus.IllegalRequestError:
+            if count > 1:
+                sweep(start, count // 2)
+                sweep(start + count // 2, count - count // 2)
+            return
+        
+        offset = start - start_register
+        snapshot.values[offset:offset + count] = array("H", block)
+        snapshot.valid[offset:offset + count] = b"\x01" * count
+
+    for chunk_start in range(start_register, end_register + 1, max_count):
+        sweep(chunk_start, min(max_count, end_register - chunk_start + 1))
+    
+    return snapshot
+
+
+def diff_snapshots(old: RegisterSnapshot, new: RegisterSnapshot):
+    """Registers that differ between two snapshots as (register, old_value, new_value). None marks a hole / out of range."""
+    old_values = dict(old.registers())
+    new_values = dict(new.registers())
+    return [(register, old_values.get(register), new_values.get(register))
+            for register in sorted(old_values.keys() | new_values.keys()) if old_values.get(register) != new_values.get(register)]
+
+
+def restore_snapshot(instrument, snapshot: RegisterSnapshot, verify: bool = True):
+    """Write the registers where the device differs from 'snapshot', coalesced with plan_write_blocks().\n
+    Returns (changed register count, verify mismatches).
+    """
+    current = take_snapshot(instrument, snapshot.start_register, snapshot.start_register + len(snapshot) - 1)
+    changes = [{"register": register, "value": value} for register, live_value, value in diff_snapshots(current, snapshot)
+               if value is not None and live_value is not None]
+    return len(changes), apply_write_presets(instrument, changes, verify)
+
+
+def snapshot_file_input(prompt: str):
+    """Prompt for a snapshot file from SNAPSHOTS_DIRPATH."""
+    os.makedirs(SNAPSHOTS_DIRPATH, exist_ok=True)
+    files = sorted(name for name in os.listdir(SNAPSHOTS_DIRPATH) if name.endswith(".mbsnap"))
+    if not files:
+        raise FileNotFoundError(f"No snapshots saved in '{SNAPSHOTS_DIRPATH}'")
+    print_menu_options(files, base=1, label=f"{MENU_FMTCLR}{prompt}{RESET}")
+    option = get_int_input("Option: ") - 1
+    return RegisterSnapshot.load(os.path.join(SNAPSHOTS_DIRPATH, files[option]))
+
+
+def print_snapshot_diff(differences: list):
+    if not differences:
+        print(f"{GREEN}No differences.{RESET}")
+    for register, old_value, new_value in differences:
+        print(f"   {RED}Register: {register} - {old_value} -> {new_value}{RESET}")
+
+
+def snapshot_menu(com_port, baud_rate: int, device_ID: int):
+    """Menu handler - Take, diff and restore register space snapshots."""
+    while True:
+        print_menu_options(SNAPSHOT_OPTIONS, base=1, label=f"\n{MENU_FMTCLR}Snapshot Options - Baud: {baud_rate}, ID: {device_ID}{RESET}")
+        option = get_int_input("Option: ")
+        try:
+            if option == len(SNAPSHOT_OPTIONS):
+                break
+            if option in (1, 3, 4) and not com_port:
+                print(f"{RED}Bypass mode active. No COM device connected.{RESET}")
+                continue
+            instrument = connection_pool.get(com_port, baud_rate, device_ID) if com_port else None
+
+            if option == 1:
+                start_register = get_int_input("Start Register: ")
+                end_register = get_int_input("End Register: ")
+                start = time.monotonic()
+                snapshot = take_snapshot(instrument, start_register, end_register)
+                os.makedirs(SNAPSHOTS_DIRPATH, exist_ok=True)
+                file_path = os.path.join(SNAPSHOTS_DIRPATH, f"id{device_ID}_{start_register}-{end_register}_{time.strftime('%Y%m%d_%H%M%S')}.mbsnap")
+                snapshot.save(file_path)
+                print(f"{GREEN}Saved {len(snapshot.registers())} registers ({len(snapshot) - len(snapshot.registers())} holes) in {time.monotonic() - start:.1f}s to '{file_path}'{RESET}")
+
+            elif option == 2:
+                print_snapshot_diff(diff_snapshots(snapshot_file_input("Old Snapshot:"), snapshot_file_input("New Snapshot:")))
+
+            elif option == 3:
+                snapshot = snapshot_file_input("Snapshot:")
+                live = take_snapshot(instrument, snapshot.start_register, snapshot.start_register + len(snapshot) - 1)
+                print_snapshot_diff(diff_snapshots(snapshot, live))
+
+            elif option == 4:
+                snapshot = snapshot_file_input("Snapshot to restore:")
+                confirm = str(input(f"{BOLD}Write the snapshot values to ID: {device_ID}? (y/n): {RESET}").lower())
+                if confirm == "y":
+                    changed, mismatches = restore_snapshot(instrument, snapshot)
+                    print(f"{GREEN}Restored {changed} changed registers.{RESET}")
+                    for register, expected, actual in mismatches:
+                        print(f"   {RED}Verify failed - Register: {register} - Expected: {expected} - Read: {actual}{RESET}")
+
+        except (minimalmodbus.ModbusException, SlaveDownError) as e:
+            logging.info(f"{RED}Modbus error: {str(e)}\n{RESET}")
+        except Exception as e:
+            print(f"{RED}{e}\n{RESET}")
+
+
+class CaptureSerial:
+    """Wraps a pyserial Serial, keeping a copy of the bytes written and read while 'recording' for FrameCapture."""
+    _FIELDS = ("_serial", "recording", "tx", "rx", "tx_ns", "rx_ns")
+
+    def __init__(self, serial_port):
+        object.__setattr__(self, "_serial", serial_port)
+        self.recording = False
+        self.reset()
+
+    def reset(self):
+        self.tx = bytearray()
+        self.rx = bytearray()
+        self.tx_ns = 0
+        self.rx_ns = 0 # Time of the last byte received
+
+    def write(self, data):
+        if self.recording:
+            if not self.tx:
+                self.tx_ns = time.perf_counter_ns()
+            self.tx += data
+        return self._serial.write(data)
+
+    def read(self, size: int = 1):
+        data = self._serial.read(size)
+        if self.recording and data:
+            self.rx += data
+            self.rx_ns = time.perf_counter_ns()
+        return data
+
+    def readinto(self, buffer):
+        count = self._serial.readinto(buffer)
+        if self.recording and count:
+            self.rx += buffer[:count]
+            self.rx_ns = time.perf_counter_ns()
+        return count
+
+    def __getattr__(self, name):
+        return getattr(self._serial, name)
+
+    def __setattr__(self, name, value):
+        if name in self._FIELDS:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._serial, name, value) # e.g. timeout / baudrate go to the real port
+
+
+def capture_index_path(file_path: str):
+    return os.path.splitext(file_path)[0] + ".mbidx"
+
+
+class FrameCapture:
+    """Records the raw request / response frames of every pooled transaction to a binary capture file.\n
+    File layout: CAPTURE_HEADER, then records that each start with a kind byte. A port record (CAPTURE_PORT + port name)
+    precedes the first frame on each port / baud rate. A frame record (CAPTURE_FRAME + request + response) holds the
+    request time in ns since the capture started and the time until the last response byte arrived.
+    The ".mbidx" index gets an INDEX_ENTRY for every port record and every CAPTURE_INDEX_INTERVAL frames, so readers
+    can seek by time without scanning. Both files are append-only, so a capture that was cut short is still readable.
+    """
+    CAPTURE_HEADER = struct.Struct("<4sHQ") # magic, version, capture start (ns since the epoch)
+    CAPTURE_PORT = struct.Struct("<BIH") # port index, baud rate, port name length
+    CAPTURE_FRAME = struct.Struct("<BBQIHH") # port index, device ID, request time (ns), response time (ns), request length, response length
+    INDEX_ENTRY = struct.Struct("<BQQ") # record kind, time (ns since the capture started), file offset
+    MAGIC = b"MBCP"
+    PORT_RECORD = 1
+    FRAME_RECORD = 2
+
+    def __init__(self):
+        self.file_path = None
+        self.frames = 0
+        self._file = None
+        self._index = None
+        self._ports: dict[tuple, int] = {} # (port, baud rate) -> port index
+        self._start_ns = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self._file is not None
+
+    def start(self, file_path: str):
+        with self._lock:
+            if self._file is not None:
+                raise RuntimeError(f"Already capturing to '{self.file_path}'")
+            self._file = open(file_path, "wb")
+            self._index = open(capture_index_path(file_path), "wb")
+            self._start_ns = time.perf_counter_ns()
+            self._file.write(self.CAPTURE_HEADER.pack(self.MAGIC, 1, time.time_ns()))
+            self.file_path = file_path
+            self.frames = 0
+            self._ports = {}
+
+    def stop(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._index.close()
+            self._file = None
+            self._index = None
+
+    def attach(self, instrument):
+        """Start recording the instrument's serial traffic for one transaction (wrapping its port the first time)."""
+        if instrument.serial is None:
+            return
+        if not isinstance(instrument.serial, CaptureSerial):
+            instrument.serial = CaptureSerial(instrument.serial)
+        instrument.serial.reset()
+        instrument.serial.recording = True
+
+    def record(self, instrument, com_port, baud_rate: int, device_id: int):
+        """Write the frames of the transaction started with attach(). A request with no response is recorded too."""
+        serial_port = instrument.serial
+        if not isinstance(serial_port, CaptureSerial):
+            return
+        serial_port.recording = False
+        if not serial_port.tx:
+            return
+        
+        request, response = bytes(serial_port.tx), bytes(serial_port.rx)
+        response_ns = min(serial_port.rx_ns - serial_port.tx_ns, 0xFFFFFFFF) if response else 0
+        with self._lock:
+            if self._file is None:
+                return
+            time_ns = max(serial_port.tx_ns - self._start_ns, 0)
+            
+            port_idx = self._ports.get((com_port, baud_rate))
+            if port_idx is None:
+                port_idx = self._ports[(com_port, baud_rate)] = len(self._ports)
+                name = str(com_port).encode()
+                self._index.write(self.INDEX_ENTRY.pack(self.PORT_RECORD, time_ns, self._file.tell()))
+                self._file.write(bytes([self.PORT_RECORD]) + self.CAPTURE_PORT.pack(port_idx, baud_rate, len(name)) + name)
+            
+            if self.frames % CAPTURE_INDEX_INTERVAL == 0:
+                self._index.write(self.INDEX_ENTRY.pack(self.FRAME_RECORD, time_ns, self._file.tell()))
+            self._file.write(bytes([self.FRAME_RECORD]) + self.CAPTURE_FRAME.pack(port_idx, device_id, time_ns, response_ns, len(request), len(response)))
+            self._file.write(request)
+            self._file.write(response)
+            self.frames += 1
+
+
+frame_capture = FrameCapture() # Shared by every pooled connection - idle until started from the Capture / Replay menu or --capture
+
+
+def read_capture(file_path: str, start: float = 0.0):
+    """Yield (time, port, baud rate, device ID, request, response, response time) tuples from a FrameCapture file.\n
+    Times are in seconds since the capture started. Frames before 'start' are skipped using the ".mbidx" index when
+    there is one. A truncated last record ends the capture.
+    """
+    ports = {} # Port index -> (port, baud rate)
+    start_ns = int(start * 1e9)
+    
+    def read_port(f):
+        header = f.read(FrameCapture.CAPTURE_PORT.size)
+        if len(header) < FrameCapture.CAPTURE_PORT.size:
+            return False
+        port_idx, baud_rate, name_length = FrameCapture.CAPTURE_PORT.unpack(header)
+        ports[port_idx] = (f.read(name_length).decode(), baud_rate)
+        return True
+
+    with open(file_path, "rb") as f:
+        magic, _, _ = FrameCapture.CAPTURE_HEADER.unpack(f.read(FrameCapture.CAPTURE_HEADER.size))
+        if magic != FrameCapture.MAGIC:
+            raise ValueError(f"'{file_path}' is not a traffic capture file")
+        offset = f.tell()
+        file_size = os.path.getsize(file_path)
+
+        index_path = capture_index_path(file_path)
+        if start_ns and os.path.exists(index_path):
+            with open(index_path, "rb") as index:
+                entries = index.read()
+            entries = entries[:len(entries) - len(entries) % FrameCapture.INDEX_ENTRY.size]
+            for kind, time_ns, file_offset in FrameCapture.INDEX_ENTRY.iter_unpack(entries):
+                if file_offset >= file_size:
+                    break # The index can run ahead of a capture file that wasn't closed cleanly
+                if kind == FrameCapture.PORT_RECORD:
+                    f.seek(file_offset + 1)
+                    read_port(f)
+                elif time_ns <= start_ns:
+                    offset = file_offset
+            f.seek(offset)
+
+        while True:
+            kind = f.read(1)
+            if not kind:
+                break
+            if kind[0] == FrameCapture.PORT_RECORD:
+                if not read_port(f):
+                    break
+                continue
+            
+            header = f.read(FrameCapture.CAPTURE_FRAME.size)
+            if len(header) < FrameCapture.CAPTURE_FRAME.size:
+                break
+            port_idx, device_id, time_ns, response_ns, request_length, response_length = FrameCapture.CAPTURE_FRAME.unpack(header)
+            request = f.read(request_length)
+            response = f.read(response_length)
+            if len(response) < response_length:
+                break
+            if time_ns < start_ns:
+                continue
+            com_port, baud_rate = ports[port_idx]
+            yield time_ns / 1e9, com_port, baud_rate, device_id, request, response, response_ns / 1e9
+
+
+def replay_capture(file_path: str, speed: float = 1.0, com_port=None, start: float = 0.0):
+    """Re-send the captured requests at their recorded times (divided by 'speed') and compare the responses.\n
+    With no 'com_port', the recorded responses are served at their recorded response times by a simulator.ReplaySlave
+    on a local pty, reproducing the field bus offline. Otherwise the requests go to the device on 'com_port'.
+    Only the frames of the first port in the capture are replayed. Returns the replay stats as a dict.
+    """
+    frames = list(read_capture(file_path, start))
+    if not frames:
+        raise ValueError(f"No frames in '{file_path}'")
+    captured_port, baud_rate = frames[0][1], frames[0][2]
+    frames = [frame for frame in frames if frame[1] == captured_port and frame[2] == baud_rate]
+
+    slave = None
+    if com_port is None:
+        from simulator import ReplaySlave # Deferred - pty based, only needed for offline replay
+        slave = ReplaySlave([(request, response, response_time) for _, _, _, _, request, response, response_time in frames], speed).start()
+        com_port = slave.port
+
+    line = serial.Serial(com_port, baud_rate, bytesize=BYTESIZE, parity=PARITY, stopbits=STOPBITS)
+    stats = {"port": captured_port, "baud_rate": baud_rate, "frames": len(frames), "matched": 0, "mismatched": 0, "no_response": 0, "max_lag_ms": 0.0}
+    latencies = []
+    try:
+        first_time = frames[0][0]
+        replay_start = time.perf_counter()
+        for time_offset, _, _, _, request, response, response_time in frames:
+            wait = (time_offset - first_time) / speed - (time.perf_counter() - replay_start)
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                stats["max_lag_ms"] = max(stats["max_lag_ms"], round(-wait * 1000, 3)) # Behind the recorded schedule
+            
+            line.timeout = response_timeout(baud_rate, max(len(response), 5), len(request)) + response_time / speed
+            line.reset_input_buffer()
+            sent = time.perf_counter()
+            line.write(request)
+            received = line.read(len(response) or 5)
+            
+            if received:
+                latencies.append(time.perf_counter() - sent)
+            if received == response:
+                stats["matched"] += 1 # Includes recorded timeouts reproduced as silence
+            elif not received:
+                stats["no_response"] += 1
+            else:
+                stats["mismatched"] += 1
+        stats["elapsed"] = round(time.perf_counter() - replay_start, 3)
+    finally:
+        line.close()
+        if slave is not None:
+            slave.stop()
+
+    latencies.sort()
+    stats["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None
+    stats["p99_ms"] = round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 3) if latencies else None
+    return stats
+
+
+def capture_file_input(prompt: str):
+    """Prompt for a capture file from CAPTURES_DIRPATH."""
+    os.makedirs(CAPTURES_DIRPATH, exist_ok=True)
+    files = sorted(name for name in os.listdir(CAPTURES_DIRPATH) if name.endswith(".mbcap"))
+    if not files:
+        raise FileNotFoundError(f"No captures saved in '{CAPTURES_DIRPATH}'")
+    print_menu_options(files, base=1, label=f"{MENU_FMTCLR}{prompt}{RESET}")
+    option = get_int_input("Option: ") - 1
+    return os.path.join(CAPTURES_DIRPATH, files[option])
+
+
+def capture_menu(com_port):
+    """Menu handler - Capture raw request / response frames and replay captures offline or against a device."""
+    while True:
+        status = f"Capturing to '{frame_capture.file_path}' - {frame_capture.frames} frames" if frame_capture.active else "Not capturing"
+        print_menu_options(CAPTURE_OPTIONS, base=1, label=f"\n{MENU_FMTCLR}Capture / Replay Options - {status}{RESET}")
+        option = get_int_input("Option: ")
+        try:
+            if option == len(CAPTURE_OPTIONS):
+                break
+
+            if option == 1:
+                os.makedirs(CAPTURES_DIRPATH, exist_ok=True)
+                file_path = os.path.join(CAPTURES_DIRPATH, f"capture_{time.strftime('%Y%m%d_%H%M%S')}.mbcap")
+                frame_capture.start(file_path)
+                print(f"{GREEN}Capturing every request / response to '{file_path}'. Stop it here when done.{RESET}")
+
+            elif option == 2:
+                frames = frame_capture.frames
+                frame_capture.stop()
+                print(f"{GREEN}Capture stopped - {frames} frames.{RESET}")
+
+            elif option in (3, 4):
+                file_path = capture_file_input("Capture to replay:")
+                speed = float(input("Speed (1 = original timing, 10 = 10x faster): ") or 1)
+                target = None
+                if option == 4:
+                    if not com_port:
+                        print(f"{RED}Bypass mode active. No COM device connected.{RESET}")
+                        continue
+                    confirm = str(input(f"{BOLD}Re-send every captured request, writes included, to {com_port}? (y/n): {RESET}").lower())
+                    if confirm != "y":
+                        continue
+                    connection_pool.close(com_port) # The replay opens the port itself
+                    target = com_port
+                stats = replay_capture(file_path, speed, target)
+                color = GREEN if stats["matched"] == stats["frames"] else RED
+                print(f"{color}Replayed {stats['frames']} frames from {stats['port']} in {stats['elapsed']}s - Matched: {stats['matched']}"
+                      f" - Mismatched: {stats['mismatched']} - No Response: {stats['no_response']}{RESET}")
+                print(f"   Latency p50: {stats['p50_ms']} ms - p99: {stats['p99_ms']} ms - Max lag behind the recorded timing: {stats['max_lag_ms']} ms")
+
+        except Exception as e:
+            print(f"{RED}{e}\n{RESET}")
+
+
+def pack_bits(bits: list):
+    """Pack bits LSB first into bytes (Modbus coil / discrete input byte layout)."""
+    packed = bytearray((len(bits) + 7) // 8)
+    for idx, bit in enumerate(bits):
+        if bit:
+            packed[idx // 8] |= 1 << (idx % 8)
+    return bytes(packed)
+
+
+def unpack_bits(packed: bytes, count: int):
+    """Unpack the first 'count' bits of LSB first packed bytes into a list of 0 / 1 (the inverse of pack_bits())."""
+    return [(packed[idx >> 3] >> (idx & 7)) & 1 for idx in range(count)]
+
+
+def execute_pdu(instrument, pdu: bytes):
+    """Run a Modbus request PDU (function code + data) on 'instrument' and return the response PDU.\n
+    Device errors are returned as Modbus exception responses rather than raised.
+    """
+    function_code = pdu[0]
+    try:
+        if function_code in (3, 4):
+            address, count = struct.unpack(">HH", pdu[1:5])
+            values = instrument.read_registers(address, count, function_code)
+            return struct.pack(f">BB{count}H", function_code, 2 * count, *values)
+
+        if function_code in (1, 2):
+            address, count = struct.unpack(">HH", pdu[1:5])
+            packed = read_bit_block(instrument, address, count, function_code)
+            return bytes([function_code, len(packed)]) + packed
+
+        if function_code == 5:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            instrument.write_bit(address, 1 if value == 0xFF00 else 0, 5)
+            return pdu[:5]
+
+        if function_code == 6:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            instrument.write_register(address, value, 0, 6)
+            return pdu[:5]
+
+        if function_code == 15:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            instrument.write_bits(address, [(pdu[6 + idx // 8] >> (idx % 8)) & 1 for idx in range(count)])
+            return pdu[:5]
+
+        if function_code == 16:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            instrument.write_registers(address, list(struct.unpack(f">{count}H", pdu[6:6 + 2 * count])))
+            return pdu[:5]
+
+        return bytes([function_code | 0x80, 1]) # Illegal Function
+
+    except PortDisconnectedError:
+        return bytes([function_code | 0x80, 0x0A]) # Gateway Path Unavailable
+    except (minimalmodbus.NoResponseError, SlaveDownError):
+        return bytes([function_code | 0x80, 0x0B]) # Gateway Target Device Failed to Respond
+    except minimalmodbus.SlaveDeviceBusyError:
+        return bytes([function_code | 0x80, 6]) # Server Device Busy - the client can back off and retry
+    except minimalmodbus.NegativeAcknowledgeError:
+        return bytes([function_code | 0x80, 7]) # Negative Acknowledge
+    except minimalmodbus.SlaveReportedException:
+        return bytes([function_code | 0x80, 2]) # Illegal function / address / value - minimalmodbus doesn't say which, report Illegal Data Address
+    except (AttributeError, NotImplementedError):
+        return bytes([function_code | 0x80, 1]) # Not supported by the transport
+    except Exception:
+        return bytes([function_code | 0x80, 4]) # Server Device Failure
+
+
+class GatewayTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True # Restart the gateway without waiting out TIME_WAIT on the port
+    daemon_threads = True
+
+
+class ModbusTcpGateway:
+    """Serve Modbus TCP and forward requests onto one serial port.\n
+    Requests are queued per client and the serial worker takes one request from each client in turn, so a busy client
+    can't starve the others. Identical reads that arrive while one is in flight share its response, and read
+    responses are reused for GATEWAY_CACHE_TTL seconds. Writes clear the cached reads for their device.
+    Unit ID 0 / 255 is sent to 'device_id'.
+    """
+    def __init__(self, com_port, baud_rate: int, device_id: int, host: str = GATEWAY_HOST, port: int = GATEWAY_PORT, cache_ttl: float = GATEWAY_CACHE_TTL):
+        self.com_port = com_port
+        self.baud_rate = baud_rate
+        self.device_id = device_id
+        self.cache_ttl = cache_ttl
+        self.requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self._queues: dict[int, collections.deque] = {} # Client ID -> pending (key, unit_id, pdu, future)
+        self._in_flight: dict[tuple, Future] = {}
+        self._cache: dict[tuple, tuple] = {} # (unit_id, pdu) -> (response, monotonic timestamp)
+        self._condition = threading.Condition()
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="gateway-serial", daemon=True)
+        self._worker.start()
+
+        gateway = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                gateway._serve_client(self.request)
+
+        self.server = GatewayTCPServer((host, port), Handler)
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._worker.join()
+
+    def submit(self, client_id: int, unit_id: int, pdu: bytes):
+        """Queue a request PDU for the serial line and wait for the response PDU."""
+        self.requests += 1
+        unit_id = self.device_id if unit_id in (0, 255) else unit_id
+        key = (unit_id, pdu)
+        is_read = pdu[0] in (1, 2, 3, 4)
+        
+        with self._condition:
+            future = None
+            if is_read:
+                cached = self._cache.get(key)
+                if cached is not None and time.monotonic() - cached[1] <= self.cache_ttl:
+                    self.cache_hits += 1
+                    return cached[0]
+                future = self._in_flight.get(key)
+                if future is not None:
+                    self.coalesced += 1
+            
+            if future is None:
+                future = Future()
+                if is_read:
+                    self._in_flight[key] = future
+                self._queues.setdefault(client_id, collections.deque()).append((key, is_read, future))
+                self._condition.notify()
+        
+        return future.result()
+
+    def _next_request(self):
+        """Round robin - take the oldest request of the first client with one waiting, then move that client to the back."""
+        for client_id in list(self._queues):
+            pending = self._queues.pop(client_id)
+            if pending:
+                request = pending.popleft()
+                if pending:
+                    self._queues[client_id] = pending
+                return request
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                request = self._next_request()
+                while request is None and self._running:
+                    self._condition.wait()
+                    request = self._next_request()
+                if request is None:
+                    return
+            
+            (unit_id, pdu), is_read, future = request
+            try:
+                response = execute_pdu(connection_pool.get(self.com_port, self.baud_rate, unit_id), pdu)
+            except Exception as e: # e.g. the serial port could not be opened - keep serving the other clients
+                logging.info(f"{RED}Gateway error: {e}{RESET}")
+                response = bytes([pdu[0] | 0x80, 0x0B])
+            
+            with self._condition:
+                if is_read:
+                    self._in_flight.pop((unit_id, pdu), None)
+                    if not response[0] & 0x80:
+                        self._cache[(unit_id, pdu)] = (response, time.monotonic())
+                else:
+                    for key in [key for key in self._cache if key[0] == unit_id]:
+                        del self._cache[key]
+            future.set_result(response)
+
+    def _serve_client(self, sock):
+        client_id = id(sock)
+        try:
+            while True:
+                header = self._recv_exact(sock, 7)
+                if header is None:
+                    return
+                transaction_id, protocol_id, length, unit_id = struct.unpack(">HHHB", header)
+                if length < 2:
+                    return # Malformed MBAP header - no room for a function code
+                pdu = self._recv_exact(sock, length - 1)
+                if pdu is None or protocol_id != 0:
+                    return
+                
+                response = self.submit(client_id, unit_id, pdu)
+                sock.sendall(struct.pack(">HHHB", transaction_id, 0, len(response) + 1, unit_id) + response)
+        except OSError:
+            pass
+        finally:
+            with self._condition:
+                self._queues.pop(client_id, None)
+
+    @staticmethod
+    def _recv_exact(sock, length: int):
+        data = bytearray()
+        while len(data) < length:
+            chunk = sock.recv(length - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+
+def modbus_tcp_gateway_menu(com_port, baud_rate: int, device_ID: int):
+    """Menu handler - Serve the current COM port over Modbus TCP until Ctrl+C."""
+    if not com_port:
+        print(f"{RED}Bypass mode active. No COM device to serve. Returning to Main Menu{RESET}")
+        return
+    
+    host = str(input(f"Listen address (blank for {GATEWAY_HOST}, 0.0.0.0 for LAN): ")).strip() or GATEWAY_HOST
+    port = str(input(f"TCP port (blank for {GATEWAY_PORT}): ")).strip()
+    gateway = ModbusTcpGateway(com_port, baud_rate, device_ID, host, int(port) if port else GATEWAY_PORT)
+    print(f"{MENU_FMTCLR}Modbus TCP Gateway - {host}:{gateway.server.server_address[1]} -> {com_port} - Baud: {baud_rate} (Ctrl+C to stop){RESET}")
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.shutdown()
+    print(f"\n{GREEN}Gateway stopped - Requests: {gateway.requests} - Coalesced: {gateway.coalesced} - Cache hits: {gateway.cache_hits}{RESET}")
+
+
+def run_job_operation(operation: dict, com_port, baud_rate: int, device_id: int):
+    """Run one headless job operation and return its result dict.\n
+    Supported 'op' values: read, read_multiple, read_bits, write, read_preset, write_preset, read_all, apply_group.
+    'read_multiple' and 'read_bits' take an optional "function_code" (4 for input registers, 1 for coils / 2 for discrete inputs).
+    An operation may set "id" to address a different device on the same port.
+    """
+    device_id = int(operation.get("id", device_id))
+    instrument = connection_pool.get(com_port, baud_rate, device_id)
+    op = operation["op"]
+    result = {"op": op, "port": com_port, "device_id": device_id}
+
+    # Subtract 1 from the designated registers to account for 0 base Registers
+    if op == "read":
+        register = int(operation["register"])
+        result.update(register=register, value=instrument.read_register(register - 1, 0, 3))
+
+    elif op == "read_multiple":
+        start_register = int(operation["start_register"])
+        function_code = int(operation.get("function_code", 3))
+        result.update(start_register=start_register, values=instrument.read_registers(start_register - 1, int(operation["read_count"]), function_code))
+
+    elif op == "read_bits":
+        start_register, count = int(operation["start_register"]), int(operation["read_count"])
+        result.update(start_register=start_register, values=unpack_bits(read_bit_block(instrument, start_register - 1, count, int(operation.get("function_code", 2))), count))
+
+    elif op == "write":
+        register = int(operation["register"])
+        instrument.write_register(register - 1, int(operation["value"]), 0, 16)
+        result.update(register=register, value=int(operation["value"]))
+
+    elif op == "read_preset":
+        presets = [preset for preset in preset_store.find_by_name(operation["name"]) if preset["type"] in ("read", "read_multiple")]
+        if not presets:
+            raise KeyError(f"No Read / Read-Multiple preset named '{operation['name']}'")
+        preset_key = "read_presets" if presets[0]["type"] == "read" else "read_multiple_presets"
+        preset_values = read_all_presets(instrument, {"read_presets": [], "read_multiple_presets": [], preset_key: presets[:1]})
+        result.update(name=operation["name"], value=preset_values[operation["name"]])
+
+    elif op == "write_preset":
+        presets = [preset for preset in preset_store.find_by_name(operation["name"]) if preset["type"] == "write"]
+        if not presets:
+            raise KeyError(f"No Write preset named '{operation['name']}'")
+        result.update(name=operation["name"], mismatches=apply_write_presets(instrument, presets[:1], bool(operation.get("verify", False))))
+
+    elif op == "read_all":
+        result.update(values=read_all_presets(instrument, preset_store.data))
+
+    elif op == "apply_group":
+        presets = [preset for preset in preset_store.get("write_presets") if operation.get("group") in (None, preset.get("group"))]
+        result.update(group=operation.get("group"), count=len(presets), mismatches=apply_write_presets(instrument, presets, bool(operation.get("verify", False))))
+
+    else:
+        raise ValueError(f"Unknown job operation '{op}'")
+
+    return result
+
+
+def load_job_file(file_path: str):
+    """Load job operations from a JSON list, or a JSON lines file with one operation per line."""
+    with open(file_path, "r") as f:
+        content = f.read().strip()
+    
+    if content.startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def headless_main(argv: list):
+    """Non-interactive entry point. Runs the requested operations with no prompts and prints one JSON line per result.\n
+    Returns the process exit code (1 if any operation failed).
+    """
+    global TRANSPORT
+    parser = argparse.ArgumentParser(description="Run Modbus RTU reads / writes without the interactive menus. Results are printed as JSON lines.")
+    parser.add_argument("--port", help="COM port, e.g. COM3 or /dev/ttyUSB0 (default: last session)")
+    parser.add_argument("--baud", type=int, choices=BAUD_RATES, help="(default: last session)")
+    parser.add_argument("--id", type=int, dest="device_id", help="Device ID (1-254) (default: last session)")
+    parser.add_argument("--job", help="JSON / JSON lines file of operations, e.g. {\"op\": \"read\", \"register\": 70}")
+    parser.add_argument("--read-preset", action="append", default=[], help="Read preset name (repeatable)")
+    parser.add_argument("--write-preset", action="append", default=[], help="Write preset name (repeatable)")
+    parser.add_argument("--read-all", action="store_true", help="Read every Read / Read-Multiple preset")
+    parser.add_argument("--verify", action="store_true", help="Read back written preset registers")
+    parser.add_argument("--transport", choices=["minimalmodbus", "native"], default=TRANSPORT, help="Serial transport (default: $MODBUS_TRANSPORT or minimalmodbus)")
+    parser.add_argument("--gateway", metavar="HOST:PORT", help="Serve the port as a Modbus TCP gateway (after running any operations) until Ctrl+C")
+    parser.add_argument("--capture", metavar="FILE", help="Record every request / response frame to this .mbcap capture file")
+    args = parser.parse_args(argv)
+    TRANSPORT = args.transport
+    
+    # Fill any connection settings not given from the last session profile
+    profile = load_session_profile() or {}
+    args.port = args.port or profile.get("port")
+    args.baud = args.baud or profile.get("baud_rate")
+    args.device_id = args.device_id or profile.get("device_id")
+    if not (args.port and args.baud and args.device_id):
+        parser.error("--port, --baud and --id are required when there is no saved session profile")
+
+    operations = load_job_file(args.job) if args.job else []
+    operations += [{"op": "read_preset", "name": name} for name in args.read_preset]
+    operations += [{"op": "write_preset", "name": name, "verify": args.verify} for name in args.write_preset]
+    if args.read_all:
+        operations.append({"op": "read_all"})
+
+    exit_code = 0
+    if args.capture:
+        frame_capture.start(args.capture)
+    if args.gateway:
+        connection_pool.monitor = port_monitor # Long running - keep serving across adapter replugs
+    try:
+        for operation in operations:
+            start = time.perf_counter()
+            try:
+                result = run_job_operation(operation, args.port, args.baud, args.device_id)
+                result["ok"] = True
+            except Exception as e:
+                result = {"op": operation.get("op"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+                exit_code = 1
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            print(json.dumps(result), flush=True)
+
+        if args.gateway:
+            host, _, port = args.gateway.rpartition(":")
+            gateway = ModbusTcpGateway(args.port, args.baud, args.device_id, host or GATEWAY_HOST, int(port))
+            try:
+                gateway.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                gateway.shutdown()
+    finally:
+        frame_capture.stop()
+        connection_pool.close()
+        preset_store.compact()
+        transaction_metrics.write_snapshot()
+        save_session_profile()
+
+    return exit_code
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(headless_main(sys.argv[1:]))
     main()
         
@@ -0,0 +1,226 @@
+import os
+import pty
+import tty
+import random
+import select
+import struct
+import threading
+import time
+
+# Simulated Modbus RTU slave on a pseudo-terminal pair (Linux / macOS).
+# The application opens 'SimulatedSlave.port' like any other COM port, so the real read / write paths can be
+# exercised and benchmarked without hardware.
+
+ILLEGAL_FUNCTION = 1
+ILLEGAL_DATA_ADDRESS = 2
+
+
+def crc16(data: bytes):
+    """Modbus RTU CRC16 (polynomial 0xA001, initial value 0xFFFF)."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def with_crc(frame: bytes):
+    return frame + struct.pack("<H", crc16(frame))
+
+
+def request_length(buffer: bytes):
+    """Length of the RTU request at the start of 'buffer', or None if more bytes are needed to tell."""
+    if len(buffer) < 2:
+        return None
+    function_code = buffer[1]
+    if function_code in (15, 16):
+        return 9 + buffer[6] if len(buffer) >= 7 else None
+    return 8 # FC1 - FC6 requests are all 8 bytes
+
+
+class SimulatedSlave:
+    """Modbus RTU slave served on a pty.\n
+    'registers' maps 0 based addresses to values (FC3 / FC4), 'coils' and 'discrete_inputs' map them to bits (FC1 / FC2).
+    Unmapped registers read back as their own address and unmapped bits as the address' lowest bit unless
+    'strict' is set, in which case they return an Illegal Data Address exception. 'response_delay' is added to
+    every response, 'error_rate' is the fraction of requests that get no response or a corrupted CRC, and with
+    'pace' the response is held back by the time the request and response would take on the wire at 'baud_rate'.
+    """
+    def __init__(self, registers: dict | None = None, device_id: int = 1, baud_rate: int = 9600, response_delay: float = 0.0,
+                 error_rate: float = 0.0, pace: bool = True, strict: bool = False, coils: dict | None = None, discrete_inputs: dict | None = None):
+        self.registers = registers if registers is not None else {}
+        self.coils = coils if coils is not None else {}
+        self.discrete_inputs = discrete_inputs if discrete_inputs is not None else {}
+        self.device_id = device_id
+        self.baud_rate = baud_rate
+        self.response_delay = response_delay
+        self.error_rate = error_rate
+        self.pace = pace
+        self.strict = strict
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._slave_fd)
+        self.port = os.ttyname(self._slave_fd)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="simulated-slave", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        os.close(self._master_fd)
+        os.close(self._slave_fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def char_time(self):
+        return 10 / self.baud_rate # 8N1: start + 8 data + stop bits
+
+    def _run(self):
+        buffer = b""
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([self._master_fd], [], [], 0.05)
+            if not readable:
+                buffer = b"" # Silent interval - discard any partial frame
+                continue
+
+            buffer += os.read(self._master_fd, 512)
+            length = request_length(buffer)
+            while length is not None and len(buffer) >= length:
+                request, buffer = buffer[:length], buffer[length:]
+                self._handle(request)
+                length = request_length(buffer)
+
+    def _handle(self, request: bytes):
+        self.bytes_received += len(request)
+        if crc16(request[:-2]) != struct.unpack("<H", request[-2:])[0] or request[0] != self.device_id:
+            return # Bad CRC or another device's request - a real slave stays silent
+
+        self.requests += 1
+        response = self.respond(request[:-2])
+        if not response:
+            return
+
+        if self.error_rate and random.random() < self.error_rate:
+            if random.random() < 0.5:
+                return # No response
+            response = response[:-1] + bytes([response[-1] ^ 0xFF]) # Corrupted CRC
+
+        delay = self.delay(request, response)
+        if delay:
+            time.sleep(delay)
+
+        os.write(self._master_fd, response)
+        self.bytes_sent += len(response)
+
+    def delay(self, request: bytes, response: bytes):
+        """Seconds to hold 'response' back before sending it."""
+        if self.pace:
+            return self.response_delay + (len(request) + len(response)) * self.char_time()
+        return self.response_delay
+
+    def read_value(self, address: int):
+        if address in self.registers:
+            return self.registers[address]
+        if self.strict:
+            raise KeyError(address)
+        return address & 0xFFFF
+
+    def read_bit(self, function_code: int, address: int):
+        bits = self.coils if function_code == 1 else self.discrete_inputs
+        if address in bits:
+            return bits[address]
+        if self.strict:
+            raise KeyError(address)
+        return address & 1
+
+    def respond(self, pdu: bytes):
+        """Build the full response frame (with CRC) for a request without its CRC."""
+        device_id, function_code = pdu[0], pdu[1]
+        try:
+            if function_code in (3, 4):
+                address, count = struct.unpack(">HH", pdu[2:6])
+                values = [self.read_value(address + idx) for idx in range(count)]
+                body = struct.pack(f">B{count}H", 2 * count, *values)
+
+            elif function_code in (1, 2):
+                address, count = struct.unpack(">HH", pdu[2:6])
+                packed = bytearray((count + 7) // 8)
+                for idx in range(count):
+                    if self.read_bit(function_code, address + idx):
+                        packed[idx // 8] |= 1 << (idx % 8)
+                body = bytes([len(packed)]) + packed
+
+            elif function_code == 5:
+                address, value = struct.unpack(">HH", pdu[2:6])
+                self.coils[address] = 1 if value == 0xFF00 else 0
+                body = pdu[2:6]
+
+            elif function_code == 15:
+                address, count = struct.unpack(">HH", pdu[2:6])
+                for idx in range(count):
+                    self.coils[address + idx] = (pdu[7 + idx // 8] >> (idx % 8)) & 1
+                body = pdu[2:6]
+
+            elif function_code == 6:
+                address, value = struct.unpack(">HH", pdu[2:6])
+                self.registers[address] = value
+                body = pdu[2:6]
+
+            elif function_code == 16:
+                address, count = struct.unpack(">HH", pdu[2:6])
+                for idx, value in enumerate(struct.unpack(f">{count}H", pdu[7:7 + 2 * count])):
+                    self.registers[address + idx] = value
+                body = pdu[2:6]
+
+            else:
+                return with_crc(bytes([device_id, function_code | 0x80, ILLEGAL_FUNCTION]))
+
+        except KeyError:
+            return with_crc(bytes([device_id, function_code | 0x80, ILLEGAL_DATA_ADDRESS]))
+
+        return with_crc(bytes([device_id, function_code]) + body)
+
+
+class ReplaySlave(SimulatedSlave):
+    """Serves recorded responses on a pty, to reproduce a captured field bus offline.
+
+    'frames' is a list of (request, response, response_time) tuples with full RTU frames (CRC included). Each request is
+    answered with the responses recorded for the same request bytes in turn, cycling when they run out, after the
+    recorded response time divided by 'speed'. Requests that were never answered, or never captured, get no response.
+    Recorded responses are sent byte for byte, so captured CRC errors and wrong lengths are reproduced too.
+    """
+    def __init__(self, frames: list, speed: float = 1.0):
+        super().__init__(device_id=None, pace=False)
+        self.speed = speed
+        self._responses: dict[bytes, list] = {}
+        self._next: dict[bytes, int] = {}
+        for request, response, response_time in frames:
+            self._responses.setdefault(bytes(request), []).append((bytes(response), response_time))
+
+    def _handle(self, request: bytes):
+        self.device_id = request[0] # Captures can hold several device IDs - answer as whichever one was addressed
+        super()._handle(request)
+
+    def respond(self, pdu: bytes):
+        request = with_crc(pdu)
+        recorded = self._responses.get(request)
+        if not recorded:
+            return None
+        idx = self._next.get(request, 0)
+        self._next[request] = (idx + 1) % len(recorded)
+        response, self._response_time = recorded[idx]
+        return response
+
+    def delay(self, request: bytes, response: bytes):
+        return self._response_time / self.speed
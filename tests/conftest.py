@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+@pytest.fixture
+def simulated_slave():
+    """Strict SimulatedSlave with registers 0 - 9 holding their own address, opened through the shared connection pool."""
+    pytest.importorskip("serial")
+    pytest.importorskip("minimalmodbus")
+    from simulator import SimulatedSlave
+
+    with SimulatedSlave(registers={address: address for address in range(10)}, baud_rate=115200, strict=True) as slave:
+        try:
+            yield slave
+        finally:
+            main.connection_pool.close(slave.port)
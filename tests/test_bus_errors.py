@@ -0,0 +1,24 @@
+import pytest
+
+import main
+
+
+def test_dead_device_id_does_not_disconnect_the_port(simulated_slave):
+    dead = main.connection_pool.get(simulated_slave.port, simulated_slave.baud_rate, simulated_slave.device_id + 6)
+    live = main.connection_pool.get(simulated_slave.port, simulated_slave.baud_rate, simulated_slave.device_id)
+
+    with pytest.raises(main.minimalmodbus.NoResponseError):
+        dead.read_registers(0, 1, 3)
+
+    assert dead.connection.connected
+    assert dead.connection.breakers[dead.device_id].failures == 1
+    assert live.read_registers(0, 2, 3) == [0, 1]
+
+
+def test_snapshot_leaves_illegal_addresses_as_holes(simulated_slave):
+    live = main.connection_pool.get(simulated_slave.port, simulated_slave.baud_rate, simulated_slave.device_id)
+
+    snapshot = main.take_snapshot(live, 1, 20)
+
+    assert [register for register, _ in snapshot.registers()] == list(range(1, 11))
+    assert [value for _, value in snapshot.registers()] == list(range(10))
@@ -0,0 +1,46 @@
+import pytest
+
+import main
+
+
+def test_uint16_passes_registers_through():
+    assert main.decode_registers([0, 1, 0xFFFF]) == [0, 1, 0xFFFF]
+
+
+def test_int16_is_signed():
+    assert main.decode_registers([0xFFFF, 0x8000], "int16") == [-1, -32768]
+
+
+def test_float32_word_orders():
+    assert main.decode_registers([0x4148, 0x0000], "float32") == [12.5]
+    assert main.decode_registers([0x0000, 0x4148], "float32", word_order="little") == [12.5]
+
+
+def test_little_endian_bytes_inside_registers():
+    assert main.decode_registers([0x3412], "uint16", byte_order="little") == [0x1234]
+
+
+def test_uint32_and_64_bit_types():
+    assert main.decode_registers([0x0001, 0x0002], "uint32") == [0x00010002]
+    assert main.decode_registers([0xFFFF] * 4, "int64") == [-1]
+
+
+def test_scale_and_offset():
+    assert main.decode_registers([100, 200], "int16", scale=0.1, offset=-5) == pytest.approx([5.0, 15.0])
+
+
+def test_trailing_registers_are_ignored():
+    assert main.decode_registers([0x4148, 0x0000, 0x4148], "float32") == [12.5]
+
+
+def test_bits_are_lsb_first():
+    assert main.decode_registers([0x8001], "bits") == [[1] + [0] * 14 + [1]]
+
+
+def test_decode_preset_values_without_type_fields():
+    assert main.decode_preset_values({"name": "r", "register": 1}, [1, 2]) == [1, 2]
+
+
+def test_decode_preset_values_uses_preset_fields():
+    preset = {"name": "r", "register": 1, "data_type": "float32", "word_order": "little", "scale": 2}
+    assert main.decode_preset_values(preset, [0x0000, 0x4148]) == [25.0]
@@ -0,0 +1,42 @@
+import main
+
+
+def read_preset(register: int, **fields):
+    return {"name": f"r{register}", "type": "read", "register": register, **fields}
+
+
+def read_multiple_preset(start_register: int, read_count: int, **fields):
+    return {"name": f"rm{start_register}", "type": "read_multiple", "start_register": start_register, "read_count": read_count, **fields}
+
+
+def test_presets_within_gap_share_a_block():
+    assert main.plan_read_blocks([read_preset(1), read_preset(5)]) == [(1, 5)]
+
+
+def test_presets_beyond_gap_are_separate_blocks():
+    gap = main.READ_GAP_THRESHOLD
+    assert main.plan_read_blocks([read_preset(1), read_preset(gap + 3)]) == [(1, 1), (gap + 3, 1)]
+
+
+def test_overlapping_presets_are_read_once():
+    blocks = main.plan_read_blocks([read_multiple_preset(1, 10), read_multiple_preset(5, 10), read_preset(3)])
+    assert blocks == [(1, 14)]
+
+
+def test_large_span_is_split_at_max_count():
+    blocks = main.plan_read_blocks([read_multiple_preset(1, 2 * main.MAX_READ_COUNT + 10)])
+    assert blocks == [(1, main.MAX_READ_COUNT), (1 + main.MAX_READ_COUNT, main.MAX_READ_COUNT), (1 + 2 * main.MAX_READ_COUNT, 10)]
+
+
+def test_block_is_not_extended_past_max_count():
+    blocks = main.plan_read_blocks([read_multiple_preset(1, main.MAX_READ_COUNT - 1), read_preset(main.MAX_READ_COUNT + 2)])
+    assert blocks == [(1, main.MAX_READ_COUNT - 1), (main.MAX_READ_COUNT + 2, 1)]
+
+
+def test_multi_register_data_types_widen_the_span():
+    assert main.plan_read_blocks([read_preset(10, data_type="float32"), read_preset(20, data_type="float64")]) == [(10, 14)]
+
+
+def test_tables_are_planned_separately():
+    presets = [read_preset(1), read_preset(2, function_code=4), read_preset(1, function_code=1), read_preset(100, function_code=1)]
+    assert main.plan_preset_reads(presets) == [(1, 1, 100), (3, 1, 1), (4, 2, 1)]
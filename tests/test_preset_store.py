@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def store_paths(tmp_path):
+    file_path = tmp_path / "presets.json"
+    file_path.write_text(json.dumps({
+        "read_presets": [{"name": "A", "type": "read", "register": "70"}],
+        "read_multiple_presets": [],
+        "write_presets": [],
+    }))
+    return str(file_path), str(tmp_path / "presets.journal")
+
+
+def names(store: main.PresetStore, preset_key: str = "read_presets"):
+    return [preset["name"] for preset in store.get(preset_key)]
+
+
+def edit(store: main.PresetStore):
+    store.add("read_presets", {"name": "B", "type": "read", "register": 71})
+    store.add("read_presets", {"name": "C", "type": "read", "register": 72})
+    store.update("read_presets", 0, {"name": "A2", "type": "read", "register": 80})
+    store.delete("read_presets", 1)
+
+
+def test_journal_is_replayed_on_load(store_paths):
+    store = main.PresetStore(*store_paths)
+    edit(store)
+
+    reloaded = main.PresetStore(*store_paths)
+    assert names(reloaded) == ["A2", "C"]
+    assert reloaded.find_by_name("C")[0]["register"] == 72
+
+
+def test_int_fields_are_normalized(store_paths):
+    assert main.PresetStore(*store_paths).get("read_presets")[0]["register"] == 70
+
+
+def test_partially_written_last_entry_is_ignored(store_paths):
+    store = main.PresetStore(*store_paths)
+    edit(store)
+    with open(store_paths[1], "a") as f:
+        f.write('{"op": "add", "key": "read_presets", "pre')
+
+    assert names(main.PresetStore(*store_paths)) == ["A2", "C"]
+
+
+def test_compact_clears_the_journal(store_paths):
+    store = main.PresetStore(*store_paths)
+    edit(store)
+    store.compact()
+
+    reloaded = main.PresetStore(*store_paths)
+    assert names(reloaded) == ["A2", "C"]
+    assert reloaded._journal_entries == 0
+
+
+def test_journal_left_by_a_crash_during_compact_is_not_replayed(store_paths):
+    store = main.PresetStore(*store_paths)
+    edit(store)
+    with open(store_paths[1]) as f:
+        journal = f.read()
+    store.compact()
+    with open(store_paths[1], "w") as f:
+        f.write(journal) # As if the process died after replacing "presets.json" but before removing the journal
+
+    reloaded = main.PresetStore(*store_paths)
+    assert names(reloaded) == ["A2", "C"]
+
+    reloaded.add("read_presets", {"name": "D", "type": "read", "register": 73})
+    assert names(main.PresetStore(*store_paths)) == ["A2", "C", "D"]
@@ -0,0 +1,46 @@
+import struct
+
+import pytest
+
+import main
+import simulator
+
+
+def test_crc16_known_frame():
+    # Read Holding Registers, device 1, address 0, 10 registers - CRC is sent low byte first: C5 CD
+    assert struct.pack("<H", main.crc16(bytes.fromhex("01030000000A"))) == bytes.fromhex("C5CD")
+
+
+def test_crc16_table_matches_bitwise_reference():
+    for frame in (b"", b"\x00", bytes(range(256)), bytes.fromhex("11 10 00 01 00 02 04 00 0A 01 02")):
+        assert main.crc16(frame) == simulator.crc16(frame)
+
+
+def test_crc16_accepts_memoryview():
+    frame = bytearray.fromhex("0106000100030000")
+    assert main.crc16(memoryview(frame)[:6]) == main.crc16(bytes(frame[:6]))
+
+
+@pytest.fixture
+def transport(simulated_slave):
+    instrument = main.RtuTransport(simulated_slave.port, simulated_slave.baud_rate, simulated_slave.device_id)
+    try:
+        yield instrument
+    finally:
+        instrument.serial.close()
+
+
+def test_rtu_transport_reads_registers(transport):
+    assert transport.read_registers(0, 10, 3) == list(range(10))
+    assert transport.read_register(4) == 4
+
+
+def test_rtu_transport_writes_registers(transport):
+    transport.write_registers(2, [100, 200])
+    transport.write_register(5, 300, functioncode=6)
+    assert transport.read_registers(2, 4, 3) == [100, 200, 4, 300]
+
+
+def test_rtu_transport_raises_illegal_request(transport):
+    with pytest.raises(main.minimalmodbus.IllegalRequestError):
+        transport.read_registers(8, 4, 3)